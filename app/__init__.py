@@ -72,4 +72,23 @@ def create_app():
     with app.app_context():
         db.create_all()
 
+        # Move meal photos off the meal row on databases that predate MealImage
+        from app.meals.image_store import migrate_legacy_images
+        try:
+            moved = migrate_legacy_images()
+            if moved:
+                print(f"Moved {moved} meal images into meal_image")
+        except Exception as e:
+            # e.g. another worker is running the same migration
+            db.session.rollback()
+            print(f"Error migrating meal images: {str(e)}")
+
+        # Build the daily nutrition rollup on first start after upgrading
+        from app.meals.daily_rollup import backfill_if_empty
+        try:
+            backfill_if_empty()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error backfilling daily nutrition: {str(e)}")
+
     return app
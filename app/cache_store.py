@@ -0,0 +1,153 @@
+"""
+Small SQLite-backed key/value store shared by every gunicorn worker on a host.
+
+Used for data that is expensive to rebuild but cheap to share (e.g. the AI
+news feed), plus short-lived leases so only one process does a refresh at a
+time and simple counters for stats. Values are stored as JSON alongside the
+time they were written.
+"""
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+from config import Config
+
+_initialized_path = None
+_instance_token = uuid.uuid4().hex[:8]
+
+
+def _owner():
+    # Resolved per call so forked workers never share a lease identity
+    return f'{os.getpid()}-{_instance_token}'
+
+
+def _connect():
+    global _initialized_path
+    conn = sqlite3.connect(Config.SHARED_CACHE_PATH, timeout=5, isolation_level=None)
+    if _initialized_path != Config.SHARED_CACHE_PATH:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS leases ('
+            ' name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS counters ('
+            ' name TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+        )
+        _initialized_path = Config.SHARED_CACHE_PATH
+    return conn
+
+
+def get(key):
+    """Return (value, stored_at) for key, or None if it has never been stored."""
+    conn = _connect()
+    try:
+        row = conn.execute('SELECT value, stored_at FROM entries WHERE key = ?', (key,)).fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return None
+    return json.loads(row[0]), row[1]
+
+
+def put(key, value):
+    """Store a JSON-serializable value under key, stamped with the current time."""
+    conn = _connect()
+    try:
+        conn.execute(
+            'INSERT OR REPLACE INTO entries (key, value, stored_at) VALUES (?, ?, ?)',
+            (key, json.dumps(value), time.time())
+        )
+    finally:
+        conn.close()
+
+
+def acquire_lease(name, ttl):
+    """Try to take the named lease for ttl seconds.
+
+    Returns True if this process now holds it. An expired lease (e.g. the
+    holder crashed mid-refresh) can be taken over by anyone.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        cur = conn.execute(
+            'INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+            'WHERE leases.expires_at < ?',
+            (name, _owner(), now + ttl, now)
+        )
+        return cur.rowcount == 1
+    finally:
+        conn.close()
+
+
+def release_lease(name):
+    """Release the named lease if this process holds it."""
+    conn = _connect()
+    try:
+        conn.execute('DELETE FROM leases WHERE name = ? AND owner = ?', (name, _owner()))
+    finally:
+        conn.close()
+
+
+def put_and_release(key, value, lease_name):
+    """put(key, value) and release_lease(lease_name) in a single write transaction."""
+    conn = _connect()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, value, stored_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value), time.time())
+            )
+            conn.execute('DELETE FROM leases WHERE name = ? AND owner = ?', (lease_name, _owner()))
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    finally:
+        conn.close()
+
+
+def incr(name, amount=1):
+    """Atomically add amount to a named counter shared by all workers."""
+    conn = _connect()
+    try:
+        conn.execute(
+            'INSERT INTO counters (name, value) VALUES (?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+            (name, amount)
+        )
+    finally:
+        conn.close()
+
+
+def counters(prefix):
+    """Return {name: value} for every counter whose name starts with prefix."""
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            'SELECT name, value FROM counters WHERE name LIKE ?', (prefix + '%',)
+        ).fetchall()
+    finally:
+        conn.close()
+    return dict(rows)
+
+
+def delete_older_than(prefix, max_age):
+    """Delete entries whose key starts with prefix and are older than max_age seconds."""
+    conn = _connect()
+    try:
+        conn.execute(
+            'DELETE FROM entries WHERE key LIKE ? AND stored_at < ?',
+            (prefix + '%', time.time() - max_age)
+        )
+    finally:
+        conn.close()
@@ -1,88 +1,113 @@
-from datetime import datetime, timezone, timedelta
+from datetime import timedelta
 from flask import request, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy import func
 from app.extensions import db
-from app.models import Meal
+from app.meals.daily_rollup import get_day, get_days, local_today
+from app.dashboard.trends import build_trends, RANGES as TREND_RANGES
+from app.meals.routes import today_payload, local_day_key
+from app.versions import conditional, bump, MEALS
 from app.dashboard import dashboard_bp
 
 
-@dashboard_bp.route('/summary', methods=['GET'])
-@login_required
-def summary():
-    tz_offset = request.args.get('tz_offset', 0, type=int)
-    now = datetime.now(timezone.utc) - timedelta(minutes=tz_offset)
-    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    end = start + timedelta(days=1)
-
-    meals = Meal.query.filter(
-        Meal.user_id == current_user.id,
-        Meal.logged_at >= start,
-        Meal.logged_at < end
-    ).all()
-
-    total_cal = sum(m.calories for m in meals)
-    total_protein = sum(m.protein for m in meals)
-    total_carbs = sum(m.carbs for m in meals)
-    total_fat = sum(m.fat for m in meals)
-    target = current_user.daily_calorie_target
+def summary_payload(user, totals):
+    total_cal = totals['total_calories']
+    target = user.daily_calorie_target
 
-    return jsonify(
-        total_calories=round(total_cal, 1),
-        total_protein=round(total_protein, 1),
-        total_carbs=round(total_carbs, 1),
-        total_fat=round(total_fat, 1),
+    return dict(
+        total_calories=total_cal,
+        total_protein=totals['total_protein'],
+        total_carbs=totals['total_carbs'],
+        total_fat=totals['total_fat'],
         target=target,
         remaining=round(max(0, target - total_cal), 1),
         progress_pct=round((total_cal / target) * 100, 1) if target > 0 else 0,
-        meal_count=len(meals)
+        meal_count=totals['meal_count']
     )
 
 
+def weekly_payload(user, week_totals):
+    """week_totals: {day: totals} for the 7 days ending today, from get_days()"""
+    days = []
+    for day, day_totals in week_totals.items():
+        days.append({
+            'date': day_totals['date'],
+            'day_name': day.strftime('%a'),
+            'total_calories': day_totals['total_calories'],
+            'total_protein': day_totals['total_protein'],
+            'total_carbs': day_totals['total_carbs'],
+            'total_fat': day_totals['total_fat'],
+            'meal_count': day_totals['meal_count']
+        })
+
+    # Calculate averages
+    cal_values = [d['total_calories'] for d in days if d['total_calories'] > 0]
+    avg_cal = round(sum(cal_values) / len(cal_values), 1) if cal_values else 0
+
+    return dict(
+        days=days,
+        average_calories=avg_cal,
+        target=user.daily_calorie_target
+    )
+
+
+@dashboard_bp.route('/summary', methods=['GET'])
+@login_required
+@conditional(MEALS, vary=local_day_key)
+def summary():
+    tz_offset = request.args.get('tz_offset', 0, type=int)
+    return jsonify(summary_payload(current_user, get_day(current_user.id, local_today(tz_offset))))
+
+
 @dashboard_bp.route('/weekly', methods=['GET'])
 @login_required
 def weekly():
     tz_offset = request.args.get('tz_offset', 0, type=int)
-    now = datetime.now(timezone.utc) - timedelta(minutes=tz_offset)
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    today = local_today(tz_offset)
 
-    days = []
-    for i in range(6, -1, -1):
-        day_start = today_start - timedelta(days=i)
-        day_end = day_start + timedelta(days=1)
+    # Seven primary-key lookups on the daily rollup, in one query
+    week_totals = get_days(current_user.id, today - timedelta(days=6), today)
+    return jsonify(weekly_payload(current_user, week_totals))
 
-        meals = Meal.query.filter(
-            Meal.user_id == current_user.id,
-            Meal.logged_at >= day_start,
-            Meal.logged_at < day_end
-        ).all()
 
-        total_cal = sum(m.calories for m in meals)
-        total_protein = sum(m.protein for m in meals)
-        total_carbs = sum(m.carbs for m in meals)
-        total_fat = sum(m.fat for m in meals)
+@dashboard_bp.route('/bootstrap', methods=['GET'])
+def bootstrap():
+    """Everything the Nutri-Track page needs on load, in one round trip:
+    auth status, today's meals, the summary and the weekly totals.
 
-        days.append({
-            'date': day_start.strftime('%Y-%m-%d'),
-            'day_name': day_start.strftime('%a'),
-            'total_calories': round(total_cal, 1),
-            'total_protein': round(total_protein, 1),
-            'total_carbs': round(total_carbs, 1),
-            'total_fat': round(total_fat, 1),
-            'meal_count': len(meals)
-        })
+    The week's rollup rows are read once and today's row is reused for the
+    summary and today's totals, so this is two queries besides the user.
+    """
+    if not current_user.is_authenticated:
+        return jsonify(auth={'logged_in': False})
 
-    # Calculate averages
-    cal_values = [d['total_calories'] for d in days if d['total_calories'] > 0]
-    avg_cal = round(sum(cal_values) / len(cal_values), 1) if cal_values else 0
+    tz_offset = request.args.get('tz_offset', 0, type=int)
+    today = local_today(tz_offset)
+    week_totals = get_days(current_user.id, today - timedelta(days=6), today)
+    today_totals = week_totals[today]
 
     return jsonify(
-        days=days,
-        average_calories=avg_cal,
-        target=current_user.daily_calorie_target
+        auth={
+            'logged_in': True,
+            'username': current_user.username,
+            'calorie_target': current_user.daily_calorie_target
+        },
+        today=today_payload(current_user, tz_offset, today_totals),
+        summary=summary_payload(current_user, today_totals),
+        weekly=weekly_payload(current_user, week_totals)
     )
 
 
+@dashboard_bp.route('/trends', methods=['GET'])
+@login_required
+def trends():
+    days = request.args.get('days', 30, type=int)
+    if days not in TREND_RANGES:
+        return jsonify(error=True, message=f'days must be one of {", ".join(map(str, TREND_RANGES))}'), 400
+
+    tz_offset = request.args.get('tz_offset', 0, type=int)
+    return jsonify(build_trends(current_user.id, days, local_today(tz_offset), current_user.daily_calorie_target))
+
+
 @dashboard_bp.route('/target', methods=['PUT'])
 @login_required
 def update_target():
@@ -100,6 +125,7 @@ def update_target():
         return jsonify(error=True, message='Invalid target value'), 400
 
     current_user.daily_calorie_target = target
+    bump(MEALS, current_user.id)
     db.session.commit()
 
     return jsonify(success=True, new_target=target)
@@ -0,0 +1,156 @@
+"""
+Long-range nutrition trends for /dashboard/trends.
+
+Daily totals come from the DailyNutrition rollup in a single query and are
+laid out as dense NumPy arrays (one slot per calendar day, zeros where
+nothing was logged). Rolling averages, adherence, macro ratios and streaks
+are all computed with array operations, and long ranges are downsampled
+with Largest-Triangle-Three-Buckets so the chart gets a bounded number of
+points that still keeps the peaks and dips.
+"""
+from datetime import timedelta
+
+import numpy as np
+from app.extensions import db
+from app.models import DailyNutrition
+from config import Config
+
+RANGES = (30, 90, 365)
+ROLLING_WINDOW = 7
+# A logged day counts as on target within this fraction of the calorie target
+ADHERENCE_TOLERANCE = 0.10
+KCAL_PER_GRAM = {'protein': 4, 'carbs': 4, 'fat': 9}
+
+
+def load_daily_arrays(user_id, first_day, last_day):
+    """Dense per-day arrays for [first_day, last_day] from one rollup query"""
+    n = (last_day - first_day).days + 1
+    arrays = {name: np.zeros(n) for name in ('calories', 'protein', 'carbs', 'fat', 'meal_count')}
+
+    rows = db.session.query(
+        DailyNutrition.day,
+        DailyNutrition.total_calories,
+        DailyNutrition.total_protein,
+        DailyNutrition.total_carbs,
+        DailyNutrition.total_fat,
+        DailyNutrition.meal_count
+    ).filter(
+        DailyNutrition.user_id == user_id,
+        DailyNutrition.day >= first_day,
+        DailyNutrition.day <= last_day
+    ).all()
+    if rows:
+        offsets = np.array([(row[0] - first_day).days for row in rows])
+        columns = np.array([row[1:] for row in rows], dtype=float)
+        for i, name in enumerate(('calories', 'protein', 'carbs', 'fat', 'meal_count')):
+            arrays[name][offsets] = np.nan_to_num(columns[:, i])
+    return arrays
+
+
+def rolling_sum(values, window):
+    """Sum over the trailing window (shorter at the start) via a cumulative sum"""
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    ends = np.arange(1, len(values) + 1)
+    return cumulative[ends] - cumulative[np.maximum(ends - window, 0)]
+
+
+def runs(mask):
+    """(longest, current) run of consecutive True values.
+
+    The current run may end yesterday, so a streak isn't reported as broken
+    just because nothing has been logged yet today.
+    """
+    if not mask.any():
+        return 0, 0
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+    current = int(lengths[-1]) if ends[-1] >= len(mask) - 1 else 0
+    return int(lengths.max()), current
+
+
+def lttb_indices(values, threshold):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps out of values"""
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    y = np.asarray(values, dtype=float)
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        # Twice the triangle area formed with the previous pick and the next bucket's average
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(area.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+
+def build_trends(user_id, days, today, target):
+    """Trend series and summary stats for the last `days` days up to today"""
+    first_day = today - timedelta(days=days - 1)
+    # Read a little history before the range so the first rolling averages are full
+    arrays = load_daily_arrays(user_id, first_day - timedelta(days=ROLLING_WINDOW - 1), today)
+
+    logged = arrays['meal_count'] > 0
+    rolling_cal = rolling_sum(arrays['calories'], ROLLING_WINDOW)
+    rolling_days = rolling_sum(logged, ROLLING_WINDOW)
+    rolling_avg = np.divide(rolling_cal, rolling_days, out=np.zeros_like(rolling_cal), where=rolling_days > 0)
+
+    # Drop the lookback days
+    skip = ROLLING_WINDOW - 1
+    calories = arrays['calories'][skip:]
+    logged = logged[skip:]
+    rolling_avg = rolling_avg[skip:]
+
+    if target:
+        on_target = logged & (np.abs(calories - target) <= target * ADHERENCE_TOLERANCE)
+    else:
+        on_target = np.zeros_like(logged)
+    logged_days = int(logged.sum())
+
+    macro_kcal = {name: float(arrays[name][skip:].sum()) * factor for name, factor in KCAL_PER_GRAM.items()}
+    macro_total = sum(macro_kcal.values())
+
+    longest_streak, current_streak = runs(logged)
+    longest_on_target, current_on_target = runs(on_target)
+
+    indices = lttb_indices(calories, Config.TRENDS_MAX_POINTS)
+    points = [{
+        'date': (first_day + timedelta(days=int(i))).isoformat(),
+        'total_calories': round(float(calories[i]), 1),
+        'total_protein': round(float(arrays['protein'][skip + i]), 1),
+        'total_carbs': round(float(arrays['carbs'][skip + i]), 1),
+        'total_fat': round(float(arrays['fat'][skip + i]), 1),
+        'rolling_average': round(float(rolling_avg[i]), 1),
+        'pct_of_target': round(float(calories[i]) / target * 100, 1) if target else 0
+    } for i in indices]
+
+    return {
+        'days': days,
+        'target': target,
+        'points': points,
+        'downsampled': len(indices) < days,
+        'summary': {
+            'logged_days': logged_days,
+            'average_calories': round(float(calories[logged].mean()), 1) if logged_days else 0,
+            'adherence_pct': round(float(on_target.sum()) / logged_days * 100, 1) if logged_days else 0,
+            'macro_ratio': {name: round(kcal / macro_total * 100, 1) if macro_total else 0
+                            for name, kcal in macro_kcal.items()},
+            'current_streak': current_streak,
+            'longest_streak': longest_streak,
+            'current_on_target_streak': current_on_target,
+            'longest_on_target_streak': longest_on_target
+        }
+    }
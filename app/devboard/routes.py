@@ -4,11 +4,13 @@ from flask import request, jsonify
 from flask_login import login_required, current_user
 from app.extensions import db
 from app.models import DevLog
+from app.versions import conditional, bump, DEVLOG
 from app.devboard import devboard_bp
 
 
 @devboard_bp.route('/logs', methods=['GET'])
 @login_required
+@conditional(DEVLOG, shared=True)
 def get_logs():
     """Get all dev logs with optional filtering"""
     # Get query parameters
@@ -91,6 +93,7 @@ def create_log():
     )
 
     db.session.add(log)
+    bump(DEVLOG)
     db.session.commit()
 
     return jsonify(success=True, log_id=log.id)
@@ -118,6 +121,7 @@ def update_log(log_id):
     if 'verbosity_level' in data:
         log.verbosity_level = int(data['verbosity_level'])
 
+    bump(DEVLOG)
     db.session.commit()
 
     return jsonify(success=True)
@@ -130,6 +134,7 @@ def delete_log(log_id):
     log = DevLog.query.get_or_404(log_id)
 
     db.session.delete(log)
+    bump(DEVLOG)
     db.session.commit()
 
     return jsonify(success=True)
@@ -137,6 +142,7 @@ def delete_log(log_id):
 
 @devboard_bp.route('/stats', methods=['GET'])
 @login_required
+@conditional(DEVLOG, shared=True)
 def get_stats():
     """Get development statistics"""
     total_logs = DevLog.query.count()
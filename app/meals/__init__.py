@@ -1,5 +1,34 @@
+import click
 from flask import Blueprint
 
 meals_bp = Blueprint('meals', __name__, url_prefix='/api/meals')
 
 from app.meals import routes  # noqa: E402, F401
+
+
+@meals_bp.cli.command('migrate-images')
+def migrate_images_command():
+    """Move meal thumbnails from meal.image_data into the meal_image table."""
+    from app.meals.image_store import migrate_legacy_images
+    print(f'Moved {migrate_legacy_images()} meal images')
+
+
+@meals_bp.cli.command('rebuild-rollups')
+@click.option('--user', 'user_id', type=int, default=None, help='Only rebuild this user id.')
+def rebuild_rollups_command(user_id):
+    """Recompute the DailyNutrition rollup from the meal table."""
+    from app.meals.daily_rollup import rebuild
+    print(f'Rebuilt {rebuild(user_id)} daily totals')
+
+
+@meals_bp.cli.command('check-rollups')
+@click.option('--user', 'user_id', type=int, default=None, help='Only check this user id.')
+def check_rollups_command(user_id):
+    """Report days where DailyNutrition disagrees with the meal table."""
+    from app.meals.daily_rollup import check
+    problems = check(user_id)
+    for problem in problems:
+        print(problem)
+    print(f'{len(problems)} inconsistent day(s)')
+    if problems:
+        raise SystemExit(1)
@@ -0,0 +1,178 @@
+"""
+Result cache for Gemini food photo analysis.
+
+Exact re-uploads are matched on a SHA-256 of the image bytes. Re-takes of
+the same plate (slightly different crop or compression) are matched on a
+64-bit difference hash: the hash is split into four 16-bit bands, so any
+photo within 3 bits of a cached one shares at least one band exactly and
+can be found with an indexed lookup before checking the full distance.
+"""
+import hashlib
+import io
+import json
+from datetime import datetime, timezone, timedelta
+
+from PIL import Image
+from sqlalchemy import or_
+from app import cache_store
+from app.extensions import db
+from app.models import FoodAnalysisCache
+from app.meals.gemini_service import analyze_food_image
+from config import Config
+
+# Max differing bits for two photos to count as the same meal
+NEAR_DUPLICATE_DISTANCE = 3
+STATS_PREFIX = 'image_analysis_cache:'
+
+
+def difference_hash_image(img):
+    """64-bit dHash of a decoded PIL image as a 16-char hex string"""
+    img = img.convert('L').resize((9, 8))
+    pixels = list(img.getdata())
+
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+    return f'{bits:016x}'
+
+
+def difference_hash(image_bytes):
+    """64-bit dHash of encoded image bytes"""
+    img = Image.open(io.BytesIO(image_bytes))
+    img.draft('L', (64, 64))
+    return difference_hash_image(img)
+
+
+def _bands(phash):
+    if phash is None:
+        return [None] * 4
+    return [phash[i:i + 4] for i in range(0, 16, 4)]
+
+
+def _hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def _lookup(content_hash, phash):
+    """Find a live cache entry by exact hash, then by near-duplicate phash"""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.ANALYSIS_CACHE_TTL)
+    live = FoodAnalysisCache.query.filter(FoodAnalysisCache.created_at >= cutoff)
+
+    entry = live.filter(FoodAnalysisCache.content_hash == content_hash).first()
+    if entry:
+        return entry, 'hit'
+
+    if phash is None:
+        return None, 'miss'
+
+    band0, band1, band2, band3 = _bands(phash)
+    candidates = live.filter(or_(
+        FoodAnalysisCache.phash_band0 == band0,
+        FoodAnalysisCache.phash_band1 == band1,
+        FoodAnalysisCache.phash_band2 == band2,
+        FoodAnalysisCache.phash_band3 == band3
+    )).limit(50).all()
+
+    best = min(candidates, key=lambda c: _hamming(c.phash, phash), default=None)
+    if best and _hamming(best.phash, phash) <= NEAR_DUPLICATE_DISTANCE:
+        return best, 'near_hit'
+    return None, 'miss'
+
+
+def _store(content_hash, phash, result):
+    band0, band1, band2, band3 = _bands(phash)
+    db.session.add(FoodAnalysisCache(
+        content_hash=content_hash,
+        phash=phash,
+        phash_band0=band0,
+        phash_band1=band1,
+        phash_band2=band2,
+        phash_band3=band3,
+        result=json.dumps(result)
+    ))
+    _evict()
+    db.session.commit()
+
+
+def _evict():
+    """Drop expired entries, then the least recently hit ones beyond the size cap"""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.ANALYSIS_CACHE_TTL)
+    FoodAnalysisCache.query.filter(FoodAnalysisCache.created_at < cutoff).delete(synchronize_session=False)
+
+    overflow = FoodAnalysisCache.query.count() - Config.ANALYSIS_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        stale_ids = [row.id for row in FoodAnalysisCache.query.with_entities(FoodAnalysisCache.id)
+                     .order_by(FoodAnalysisCache.last_hit_at.asc()).limit(overflow)]
+        FoodAnalysisCache.query.filter(FoodAnalysisCache.id.in_(stale_ids)).delete(synchronize_session=False)
+
+
+def image_cache_keys(image_bytes, phash=None):
+    """(content_hash, phash) for an image; pass phash if already computed"""
+    content_hash = hashlib.sha256(image_bytes).hexdigest()
+    if phash is None:
+        try:
+            phash = difference_hash(image_bytes)
+        except Exception:
+            # Undecodable here - still cacheable by exact content
+            phash = None
+    return content_hash, phash
+
+
+def lookup_image_analysis(content_hash, phash):
+    """Return (result, cache_status) from the cache; result is None on a miss"""
+    entry, status = _lookup(content_hash, phash)
+    cache_store.incr(STATS_PREFIX + status)
+    if not entry:
+        return None, status
+
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_hit_at = datetime.now(timezone.utc)
+    db.session.commit()
+    return json.loads(entry.result), status
+
+
+def store_image_analysis(content_hash, phash, result):
+    """Cache a fresh Gemini result (best-effort)"""
+    try:
+        _store(content_hash, phash, result)
+    except Exception:
+        # e.g. a concurrent insert of the same photo
+        db.session.rollback()
+
+
+def analyze_food_image_cached(image_bytes, mime_type, phash=None):
+    """Cached analyze_food_image. Returns (result, cache_status).
+
+    cache_status is 'hit' (same bytes), 'near_hit' (perceptually the same
+    photo) or 'miss' (Gemini was called and the result stored). Pass phash
+    if the caller has already decoded the image.
+    """
+    content_hash, phash = image_cache_keys(image_bytes, phash)
+    result, status = lookup_image_analysis(content_hash, phash)
+    if result is not None:
+        return result, status
+
+    result = analyze_food_image(image_bytes, mime_type)
+    store_image_analysis(content_hash, phash, result)
+    return result, 'miss'
+
+
+def cache_stats():
+    """Hit-rate stats across all workers, plus current cache size"""
+    counts = cache_store.counters(STATS_PREFIX)
+    hits = counts.get(STATS_PREFIX + 'hit', 0)
+    near_hits = counts.get(STATS_PREFIX + 'near_hit', 0)
+    misses = counts.get(STATS_PREFIX + 'miss', 0)
+    total = hits + near_hits + misses
+    return {
+        'hits': hits,
+        'near_hits': near_hits,
+        'misses': misses,
+        'hit_rate': round((hits + near_hits) / total, 3) if total else 0,
+        'entries': FoodAnalysisCache.query.count(),
+        'max_entries': Config.ANALYSIS_CACHE_MAX_ENTRIES,
+        'ttl_seconds': Config.ANALYSIS_CACHE_TTL
+    }
@@ -0,0 +1,140 @@
+"""
+DailyNutrition: running per-day totals so dashboards never rescan meals.
+
+log_meal and delete_meal call apply_meal() before committing, so the rollup
+changes in the same transaction as the meal. rebuild() recomputes it from
+the meal table (backfill, or repair after check() finds drift).
+
+Days are keyed by the calendar date of Meal.logged_at. That matches how
+get_today_range() and the dashboard windows already bucket meals: the
+user's local midnight is compared against logged_at directly, so a meal
+belongs to the local day whose date equals logged_at's date.
+"""
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models import Meal, DailyNutrition
+
+MACROS = ('calories', 'protein', 'carbs', 'fat')
+
+
+def local_today(tz_offset_minutes=0):
+    """The rollup day for 'today' in the user's timezone"""
+    return (datetime.now(timezone.utc) - timedelta(minutes=tz_offset_minutes)).date()
+
+
+def apply_meal(meal, sign=1):
+    """Add (sign=1) or remove (sign=-1) a meal from its day's totals. Doesn't commit."""
+    if meal.logged_at is None:
+        meal.logged_at = datetime.now(timezone.utc)
+    day = meal.logged_at.date()
+    deltas = {f'total_{field}': sign * (getattr(meal, field) or 0) for field in MACROS}
+    deltas['meal_count'] = sign
+
+    # Atomic increment, so concurrent logs for the same day can't lose updates
+    updated = DailyNutrition.query.filter_by(user_id=meal.user_id, day=day).update(
+        {getattr(DailyNutrition, column): getattr(DailyNutrition, column) + delta
+         for column, delta in deltas.items()},
+        synchronize_session=False
+    )
+    if not updated and sign > 0:
+        try:
+            with db.session.begin_nested():
+                db.session.add(DailyNutrition(user_id=meal.user_id, day=day, **deltas))
+        except IntegrityError:
+            # Someone else created the row in the meantime
+            return apply_meal(meal, sign)
+
+    if sign < 0:
+        DailyNutrition.query.filter(
+            DailyNutrition.user_id == meal.user_id,
+            DailyNutrition.day == day,
+            DailyNutrition.meal_count <= 0
+        ).delete(synchronize_session=False)
+
+
+def get_day(user_id, day):
+    """Totals dict for one day (zeros if nothing was logged)"""
+    row = db.session.get(DailyNutrition, (user_id, day))
+    return row_to_dict(row, day)
+
+
+def get_days(user_id, first_day, last_day):
+    """{day: totals dict} for every day in [first_day, last_day], in one query"""
+    rows = DailyNutrition.query.filter(
+        DailyNutrition.user_id == user_id,
+        DailyNutrition.day >= first_day,
+        DailyNutrition.day <= last_day
+    ).all()
+    by_day = {row.day: row for row in rows}
+    days = {}
+    day = first_day
+    while day <= last_day:
+        days[day] = row_to_dict(by_day.get(day), day)
+        day += timedelta(days=1)
+    return days
+
+
+def row_to_dict(row, day):
+    totals = {'date': day.isoformat(), 'meal_count': row.meal_count if row else 0}
+    for field in MACROS:
+        totals[f'total_{field}'] = round((getattr(row, f'total_{field}') or 0) if row else 0, 1)
+    return totals
+
+
+def _expected(user_id=None):
+    """{(user_id, day): [calories, protein, carbs, fat, count]} recomputed from meals"""
+    query = db.session.query(Meal.user_id, Meal.logged_at, Meal.calories, Meal.protein, Meal.carbs, Meal.fat)
+    if user_id is not None:
+        query = query.filter(Meal.user_id == user_id)
+
+    expected = {}
+    for uid, logged_at, *values in query.yield_per(1000):
+        totals = expected.setdefault((uid, logged_at.date()), [0.0, 0.0, 0.0, 0.0, 0])
+        for i, value in enumerate(values):
+            totals[i] += value or 0
+        totals[4] += 1
+    return expected
+
+
+def rebuild(user_id=None):
+    """Recompute the rollup from the meal table. Returns the number of days written."""
+    expected = _expected(user_id)
+    query = DailyNutrition.query
+    if user_id is not None:
+        query = query.filter(DailyNutrition.user_id == user_id)
+    query.delete(synchronize_session=False)
+
+    for (uid, day), (calories, protein, carbs, fat, count) in expected.items():
+        db.session.add(DailyNutrition(user_id=uid, day=day, total_calories=calories, total_protein=protein,
+                                      total_carbs=carbs, total_fat=fat, meal_count=count))
+    db.session.commit()
+    return len(expected)
+
+
+def check(user_id=None, tolerance=0.01):
+    """Compare the rollup with the meal table. Returns a list of mismatch descriptions."""
+    expected = _expected(user_id)
+    query = DailyNutrition.query
+    if user_id is not None:
+        query = query.filter(DailyNutrition.user_id == user_id)
+    stored = {(row.user_id, row.day): row for row in query}
+
+    problems = []
+    for key in sorted(set(expected) | set(stored), key=lambda k: (k[0], k[1])):
+        uid, day = key
+        want = expected.get(key, [0.0, 0.0, 0.0, 0.0, 0])
+        row = stored.get(key)
+        have = ([row.total_calories or 0, row.total_protein or 0, row.total_carbs or 0,
+                 row.total_fat or 0, row.meal_count or 0] if row else [0.0, 0.0, 0.0, 0.0, 0])
+        if any(abs(a - b) > tolerance for a, b in zip(want, have)):
+            problems.append(f'user {uid} {day}: expected {want}, rollup has {have}')
+    return problems
+
+
+def backfill_if_empty():
+    """First start after upgrading: build the rollup if it's empty but meals exist"""
+    if DailyNutrition.query.first() is None and Meal.query.with_entities(Meal.id).first() is not None:
+        return rebuild()
+    return 0
@@ -0,0 +1,150 @@
+"""
+Normalize free-text food queries into (quantity, unit, base food).
+
+"2 eggs", "two eggs" and "Eggs x2" all become (2, 'unit', 'egg');
+"200g chicken breast" and "0.2 kg chicken breast" both become
+(200, 'g', 'chicken breast'). Weights are converted to grams and volumes
+to millilitres so rescaled queries share one cache entry.
+"""
+import re
+
+NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11,
+    'twelve': 12, 'dozen': 12, 'half': 0.5, 'quarter': 0.25, 'couple': 2
+}
+
+# unit alias -> (canonical unit, factor to canonical)
+UNITS = {
+    'g': ('g', 1), 'gr': ('g', 1), 'gram': ('g', 1), 'grams': ('g', 1),
+    'kg': ('g', 1000), 'kgs': ('g', 1000), 'kilo': ('g', 1000), 'kilos': ('g', 1000),
+    'oz': ('g', 28.35), 'ounce': ('g', 28.35), 'ounces': ('g', 28.35),
+    'lb': ('g', 453.6), 'lbs': ('g', 453.6), 'pound': ('g', 453.6), 'pounds': ('g', 453.6),
+    'ml': ('ml', 1), 'millilitre': ('ml', 1), 'milliliter': ('ml', 1),
+    'millilitres': ('ml', 1), 'milliliters': ('ml', 1),
+    'l': ('ml', 1000), 'litre': ('ml', 1000), 'liter': ('ml', 1000),
+    'litres': ('ml', 1000), 'liters': ('ml', 1000),
+    'cup': ('cup', 1), 'cups': ('cup', 1),
+    'tbsp': ('tbsp', 1), 'tablespoon': ('tbsp', 1), 'tablespoons': ('tbsp', 1),
+    'tsp': ('tsp', 1), 'teaspoon': ('tsp', 1), 'teaspoons': ('tsp', 1),
+    'slice': ('slice', 1), 'slices': ('slice', 1),
+    'piece': ('piece', 1), 'pieces': ('piece', 1), 'pc': ('piece', 1), 'pcs': ('piece', 1),
+    'bowl': ('bowl', 1), 'bowls': ('bowl', 1),
+    'glass': ('glass', 1), 'glasses': ('glass', 1),
+    'can': ('can', 1), 'cans': ('can', 1),
+    'serving': ('serving', 1), 'servings': ('serving', 1),
+    'handful': ('handful', 1), 'handfuls': ('handful', 1),
+}
+
+FILLER_WORDS = {'of', 'x', 'the', 'some'}
+# "a banana", "half a cup of rice" - never part of the food name
+ARTICLES = {'a', 'an'}
+# Words and symbols that join several foods into one query
+CONJUNCTIONS = {'and', 'with', 'on', 'plus', 'or'}
+SEPARATORS = (',', '&', '+', ';')
+
+# Words ending in "s" that aren't plurals
+NOT_PLURAL = {'molasses', 'grits', 'swiss', 'nachos', 'jus'}
+
+_QTY_RE = re.compile(r'^(\d+(?:\.\d+)?)(?:/(\d+(?:\.\d+)?))?([a-z]*)$')
+
+
+def _singular(word):
+    if len(word) <= 3 or word in NOT_PLURAL or word.endswith(('ss', 'us')):
+        return word  # "glass", "hummus", "couscous", "asparagus"
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith('oes'):
+        return word[:-2]
+    if word.endswith(('ches', 'shes')):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+
+def normalize_text(query):
+    """Lowercase, strip punctuation (keeping decimals and fractions) and collapse spaces"""
+    text = query.lower().replace('×', ' x ')
+    text = re.sub(r'[^a-z0-9./\s]', ' ', text)
+    text = re.sub(r'(?<!\d)[./]|[./](?!\d)', ' ', text)
+    return ' '.join(text.split())
+
+
+def parse_food_query(query):
+    """Split a food query into (quantity, unit, base_food).
+
+    Quantity defaults to 1 and unit to 'unit' (a count of the food itself).
+    Returns None if the query can't be reduced to a single food (nothing
+    left after removing the quantity, more than one quantity, or several
+    foods joined by and/with/on/commas like "2 eggs and toast").
+    """
+    if any(sep in query for sep in SEPARATORS):
+        return None
+    tokens = normalize_text(query).split()
+    if any(token in CONJUNCTIONS for token in tokens):
+        return None
+    quantity = None
+    unit = None
+    words = []
+
+    for token in tokens:
+        if token in ARTICLES and not words:
+            continue
+
+        if token in NUMBER_WORDS and quantity is None and not words:
+            quantity = NUMBER_WORDS[token]
+            continue
+
+        match = _QTY_RE.match(token)
+        if match and quantity is not None:
+            # A second quantity means several foods in one query
+            return None
+        if match:
+            value = float(match.group(1))
+            if match.group(2):
+                denominator = float(match.group(2))
+                if not denominator:
+                    return None
+                value /= denominator
+            quantity = value
+            suffix = match.group(3)
+            if suffix in UNITS:
+                unit, factor = UNITS[suffix]
+                quantity *= factor
+            elif suffix == 'x':
+                pass
+            elif suffix:
+                return None
+            continue
+
+        # "2x eggs", "eggs x2" style multipliers
+        if token.startswith('x') and _QTY_RE.match(token[1:]) and quantity is None:
+            quantity = float(token[1:]) if '/' not in token else None
+            if quantity is None:
+                return None
+            continue
+
+        if unit is None and token in UNITS and (quantity is not None or not words):
+            unit, factor = UNITS[token]
+            quantity = (quantity if quantity is not None else 1) * factor
+            continue
+
+        if token in FILLER_WORDS:
+            continue
+        words.append(_singular(token))
+
+    if not words or quantity == 0:
+        return None
+
+    return (quantity if quantity is not None else 1.0), (unit or 'unit'), ' '.join(words)
+
+
+def format_portion(quantity, unit, base_food):
+    """Human-readable portion, e.g. '200g', '1.5 cup', '2 egg'"""
+    qty = f'{round(quantity, 2):g}'
+    if unit in ('g', 'ml'):
+        return f'{qty}{unit}'
+    if unit == 'unit':
+        return f'{qty} {base_food}'
+    return f'{qty} {unit}'
@@ -1,17 +1,100 @@
+import hashlib
 import json
 import os
+import threading
+import time
+import httpx
 from google import genai
-from google.genai import types
+from google.genai import errors, types
+from app.meals.food_query import normalize_text
+from app.meals.json_stream import JsonArrayStream
+from app.meals.resilience import ResilientCaller, DeadlineExceeded
+from app.meals.single_flight import single_flight
+from config import Config
+
+
+class GeminiNotConfigured(Exception):
+    """Raised when a Gemini call is attempted without an API key"""
+
+
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+
+
+def _reset_client_after_fork():
+    # A forked gunicorn worker must not reuse the parent's pooled sockets
+    global _client, _client_key
+    _client = None
+    _client_key = None
+
+
+os.register_at_fork(after_in_child=_reset_client_after_fork)
+
+
+def _http_options():
+    limits = httpx.Limits(
+        max_connections=Config.GEMINI_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.GEMINI_MAX_CONNECTIONS,
+        keepalive_expiry=Config.GEMINI_KEEPALIVE_SECONDS
+    )
+    return types.HttpOptions(
+        timeout=int(Config.GEMINI_TIMEOUT_SECONDS * 1000),
+        client_args={'limits': limits},
+        async_client_args={'limits': limits}
+    )
 
 
 def get_client():
-    return genai.Client(api_key=os.environ.get('GEMINI_API_KEY', ''))
+    """Process-wide Gemini client with a pooled, keep-alive HTTP connection.
 
+    Created lazily on first use and rebuilt if the API key changes or the
+    process forks, so TLS handshakes happen once per worker, not per call.
+    """
+    global _client, _client_key
+    api_key = os.environ.get('GEMINI_API_KEY', '')
+    if not api_key or api_key == 'PASTE_YOUR_GEMINI_API_KEY_HERE':
+        raise GeminiNotConfigured('Gemini API key not configured')
+    if _client is None or _client_key != api_key:
+        with _client_lock:
+            if _client is None or _client_key != api_key:
+                _client = genai.Client(api_key=api_key, http_options=_http_options())
+                _client_key = api_key
+    return _client
 
-def analyze_food_image(image_bytes: bytes, mime_type: str) -> dict:
-    """Send a food photo to Gemini and get calorie/nutrition analysis."""
+
+def get_async_client():
+    """Async flavour of get_client() for asyncio callers (shares its config)"""
+    return get_client().aio
+
+
+def _is_retryable(e):
+    """Rate limits, server errors and network failures are worth retrying"""
+    if isinstance(e, errors.APIError):
+        return e.code is None or e.code == 429 or e.code >= 500
+    return isinstance(e, httpx.TransportError)
+
+
+_upstream = ResilientCaller('gemini', _is_retryable)
+
+
+def _generate(contents):
+    """generate_content with deadline, retries, hedging and circuit breaker"""
     client = get_client()
+    return _upstream.call(lambda: client.models.generate_content(
+        model='gemini-2.0-flash',
+        contents=contents
+    ))
+
+
+def upstream_stats():
+    """Circuit breaker state and latency percentiles for this worker"""
+    return _upstream.stats()
 
+
+@single_flight(lambda image_bytes, mime_type: hashlib.sha256(image_bytes).hexdigest())
+def analyze_food_image(image_bytes: bytes, mime_type: str) -> dict:
+    """Send a food photo to Gemini and get calorie/nutrition analysis."""
     prompt = """You are a professional nutritionist analyzing a food photo.
 Analyze this food image carefully and return a JSON object with EXACTLY these fields:
 
@@ -33,13 +116,10 @@ Guidelines:
 - Food score should reflect overall nutritional value
 - Return ONLY valid JSON, no markdown fences, no extra text"""
 
-    response = client.models.generate_content(
-        model='gemini-2.0-flash',
-        contents=[
-            types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
-            prompt
-        ]
-    )
+    response = _generate([
+        types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
+        prompt
+    ])
 
     text = response.text.strip()
     # Strip markdown fences if Gemini wraps the JSON
@@ -49,13 +129,10 @@ Guidelines:
     return json.loads(text)
 
 
-def get_meal_suggestions(remaining_calories: int, recent_meals: list) -> list:
-    """Get AI-powered meal suggestions based on remaining calorie budget."""
-    client = get_client()
-
+def _suggestions_prompt(remaining_calories: int, recent_meals: list) -> str:
     recent_names = ', '.join(recent_meals[-5:]) if recent_meals else 'none yet'
 
-    prompt = f"""I have {remaining_calories} calories remaining for today.
+    return f"""I have {remaining_calories} calories remaining for today.
 My recent meals today were: {recent_names}.
 
 Suggest 3 healthy meal options that each fit within {remaining_calories} calories.
@@ -69,10 +146,12 @@ Return as a JSON array of objects with these keys:
 
 Return ONLY valid JSON array, no markdown fences, no extra text."""
 
-    response = client.models.generate_content(
-        model='gemini-2.0-flash',
-        contents=[prompt]
-    )
+
+@single_flight(lambda remaining_calories, recent_meals: json.dumps(
+    [remaining_calories, sorted(recent_meals[-5:]) if recent_meals else []]))
+def get_meal_suggestions(remaining_calories: int, recent_meals: list) -> list:
+    """Get AI-powered meal suggestions based on remaining calorie budget."""
+    response = _generate([_suggestions_prompt(remaining_calories, recent_meals)])
 
     text = response.text.strip()
     if text.startswith('```'):
@@ -81,10 +160,36 @@ Return ONLY valid JSON array, no markdown fences, no extra text."""
     return json.loads(text)
 
 
-def analyze_food_text(query: str) -> dict:
-    """Analyze food from text description and return nutrition estimates."""
+def stream_meal_suggestions(remaining_calories: int, recent_meals: list):
+    """Like get_meal_suggestions, but yields each suggestion as soon as the
+    model has finished generating it.
+
+    Raises DeadlineExceeded (after the suggestions received so far) if the
+    stream runs past GEMINI_CALL_DEADLINE, so a stalled upstream can't hold
+    the worker. A gap between chunks is bounded by GEMINI_TIMEOUT_SECONDS.
+    """
     client = get_client()
+    parser = JsonArrayStream()
+    deadline = time.monotonic() + Config.GEMINI_CALL_DEADLINE
+
+    with _upstream.guard():
+        chunks = client.models.generate_content_stream(
+            model='gemini-2.0-flash',
+            contents=[_suggestions_prompt(remaining_calories, recent_meals)]
+        )
+        try:
+            for chunk in chunks:
+                if chunk.text:
+                    yield from parser.feed(chunk.text)
+                if time.monotonic() > deadline:
+                    raise DeadlineExceeded(f'suggestions stream ran past {Config.GEMINI_CALL_DEADLINE:g}s')
+        finally:
+            chunks.close()
 
+
+@single_flight(lambda query: normalize_text(query))
+def analyze_food_text(query: str) -> dict:
+    """Analyze food from text description and return nutrition estimates."""
     prompt = f"""You are a professional nutritionist. Analyze this food query:
 
 "{query}"
@@ -110,10 +215,7 @@ Guidelines:
 - Food score reflects nutritional value
 - Return ONLY valid JSON, no markdown fences, no extra text"""
 
-    response = client.models.generate_content(
-        model='gemini-2.0-flash',
-        contents=[prompt]
-    )
+    response = _generate([prompt])
 
     text = response.text.strip()
     # Strip markdown fences if present
@@ -121,3 +223,69 @@ Guidelines:
         text = text.split('\n', 1)[1].rsplit('```', 1)[0].strip()
 
     return json.loads(text)
+
+
+def analyze_food_batch(items: list) -> list:
+    """Analyze several photos and/or text entries in a single Gemini call.
+
+    items is a list of {'image': bytes, 'mime_type': str} or {'query': str}.
+    Returns a list of the same length; each element is either an analysis
+    dict (same fields as analyze_food_image) or {'error': message}.
+    """
+    prompt = f"""You are a professional nutritionist. Below are {len(items)} separate food items,
+each labelled "Item N" and given either as a photo or as a text description.
+Analyze EACH item independently.
+
+Return a JSON array with exactly {len(items)} objects, in item order, each with EXACTLY these fields:
+{{
+    "item": the item number (1-{len(items)}),
+    "food_name": "Name of the food/dish (be specific)",
+    "calories": estimated total calories as a number,
+    "protein": estimated protein in grams as a number,
+    "carbs": estimated carbohydrates in grams as a number,
+    "fat": estimated fat in grams as a number,
+    "food_score": nutritional density score from 1-10 (10 = extremely nutritious, 1 = empty calories),
+    "health_benefits": ["benefit 1", "benefit 2", "benefit 3"],
+    "health_negatives": ["negative 1", "negative 2"],
+    "portion_estimate": "estimated portion size (e.g., '1 cup', '250g', '1 medium plate')"
+}}
+If an item is not food or cannot be analyzed, return {{"item": N, "error": "short reason"}} for it.
+
+Guidelines:
+- For photos, base estimates on the visible portion size
+- For text, parse any quantity mentioned; if none, assume a standard serving
+- Include 2-5 health benefits and 1-3 health negatives
+- Return ONLY a valid JSON array, no markdown fences, no extra text"""
+
+    contents = [prompt]
+    for number, item in enumerate(items, start=1):
+        if 'image' in item:
+            contents.append(f'Item {number} (photo):')
+            contents.append(types.Part.from_bytes(data=item['image'], mime_type=item['mime_type']))
+        else:
+            contents.append(f'Item {number} (text): "{item["query"]}"')
+
+    response = _generate(contents)
+
+    text = response.text.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[1].rsplit('```', 1)[0].strip()
+
+    parsed = json.loads(text)
+    if not isinstance(parsed, list):
+        raise ValueError('Expected a JSON array from batch analysis')
+
+    # Match answers back to items by number, falling back to position
+    results = [None] * len(items)
+    for position, answer in enumerate(parsed):
+        if not isinstance(answer, dict):
+            continue
+        number = answer.pop('item', position + 1)
+        try:
+            index = int(number) - 1
+        except (TypeError, ValueError):
+            index = position
+        if 0 <= index < len(items) and results[index] is None:
+            results[index] = answer
+
+    return [r if r is not None else {'error': 'No analysis returned for this item'} for r in results]
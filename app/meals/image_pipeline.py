@@ -0,0 +1,58 @@
+"""
+One-pass preprocessing for uploaded meal photos.
+
+The upload is decoded once - using JPEG draft mode so the decoder does a
+cheap DCT-domain downscale instead of inflating a 12MP photo - and EXIF
+orientation is applied. From that single decode we produce the
+model-sized JPEG sent to Gemini, the stored thumbnail and the perceptual
+hash used by the analysis cache.
+"""
+import io
+from collections import namedtuple
+
+from PIL import Image, ImageOps
+from app.meals.analysis_cache import difference_hash_image
+from config import Config
+
+THUMBNAIL_SIZE = (300, 300)
+THUMBNAIL_QUALITY = 60
+
+PreparedImage = namedtuple('PreparedImage', ['model_bytes', 'model_mime', 'thumbnail_bytes', 'phash'])
+
+
+def _encode_jpeg(img, quality):
+    buf = io.BytesIO()
+    img.save(buf, format='JPEG', quality=quality, optimize=True)
+    return buf.getvalue()
+
+
+def prepare_image(image_bytes, mime_type):
+    """Decode an upload once and derive the model input, thumbnail and phash.
+
+    If Pillow can't decode the image, the original bytes go to the model
+    untouched and there is no thumbnail or phash.
+    """
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        long_edge = Config.GEMINI_IMAGE_MAX_EDGE
+        img.draft('RGB', (long_edge, long_edge))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+    except Exception:
+        return PreparedImage(image_bytes, mime_type, None, None)
+
+    img.thumbnail((long_edge, long_edge))
+    model_bytes = _encode_jpeg(img, Config.GEMINI_IMAGE_QUALITY)
+    # Never send more than the user uploaded
+    if len(model_bytes) >= len(image_bytes):
+        model_bytes, model_mime = image_bytes, mime_type
+    else:
+        model_mime = 'image/jpeg'
+
+    phash = difference_hash_image(img)
+
+    img.thumbnail(THUMBNAIL_SIZE)
+    thumbnail_bytes = _encode_jpeg(img, THUMBNAIL_QUALITY)
+
+    return PreparedImage(model_bytes, model_mime, thumbnail_bytes, phash)
@@ -0,0 +1,154 @@
+"""
+Meal thumbnails, stored in MealImage rather than on the Meal row.
+
+List and aggregate endpoints only ever need to know whether a meal has a
+picture; has_image_column() answers that with an EXISTS on the primary key
+so no blob bytes are read. The bytes themselves are a deferred column that
+is loaded only when an image is actually served.
+
+Besides the stored thumbnail ('detail') each image has smaller VARIANTS,
+rendered once when the meal is logged (or on first request for older
+meals) and kept in MealImageVariant. Images never change after logging, so
+they are served with a strong ETag and a long-lived Cache-Control.
+
+Between /analyze and /log the thumbnail waits in StagedImage under an
+opaque token, so it never has to round-trip through the client as base64.
+"""
+import io
+import uuid
+from datetime import datetime, timezone, timedelta
+
+from PIL import Image
+from sqlalchemy import exists, inspect, text
+from sqlalchemy.orm import undefer
+from app.extensions import db
+from app.models import Meal, MealImage, MealImageVariant, StagedImage
+from config import Config
+
+# Variant name -> long edge in pixels; 'detail' is the stored thumbnail itself
+VARIANTS = {'icon': 96}
+SIZES = ('detail',) + tuple(VARIANTS)
+VARIANT_QUALITY = 70
+
+
+def has_image_column():
+    """SELECT-able boolean: does the meal in the current row have a thumbnail"""
+    return exists().where(MealImage.meal_id == Meal.id).label('has_image')
+
+
+def image_url(meal, size='detail'):
+    """URL for a meal's image; the v parameter changes if a meal id is ever reused"""
+    return f'/api/meals/image/{meal.id}?size={size}&v={int(meal.logged_at.timestamp())}'
+
+
+def _render_variant(image_bytes, long_edge):
+    img = Image.open(io.BytesIO(image_bytes))
+    img.draft('RGB', (long_edge, long_edge))
+    img = img.convert('RGB')
+    img.thumbnail((long_edge, long_edge))
+    buf = io.BytesIO()
+    img.save(buf, format='JPEG', quality=VARIANT_QUALITY, optimize=True)
+    return buf.getvalue()
+
+
+def attach_image(meal, image_bytes, mime_type='image/jpeg'):
+    """Store image_bytes as meal's thumbnail plus its variants (committed with the meal)"""
+    meal.image = MealImage(data=image_bytes, mime_type=mime_type)
+    for name, long_edge in VARIANTS.items():
+        try:
+            data = _render_variant(image_bytes, long_edge)
+        except Exception:
+            continue  # Rendered on first request instead
+        meal.image.variants.append(MealImageVariant(variant=name, data=data))
+
+
+def stage_image(user_id, image_bytes, mime_type='image/jpeg'):
+    """Keep an analysis thumbnail until the meal is logged. Returns its token."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.STAGED_IMAGE_TTL)
+    StagedImage.query.filter(StagedImage.created_at < cutoff).delete(synchronize_session=False)
+
+    token = uuid.uuid4().hex
+    db.session.add(StagedImage(token=token, user_id=user_id, mime_type=mime_type, data=image_bytes))
+    db.session.commit()
+    return token
+
+
+def attach_staged_image(meal, token, user_id):
+    """Move a staged thumbnail onto meal (committed with the meal). Returns False
+    if the token is unknown, expired or belongs to someone else."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.STAGED_IMAGE_TTL)
+    staged = StagedImage.query.filter(
+        StagedImage.token == token,
+        StagedImage.user_id == user_id,
+        StagedImage.created_at >= cutoff
+    ).first()
+    if not staged:
+        return False
+
+    attach_image(meal, staged.data, staged.mime_type)
+    db.session.delete(staged)
+    return True
+
+
+def find_image(meal_id, user_id):
+    """The MealImage for one of the user's meals, without its bytes, or None"""
+    return MealImage.query.join(Meal, Meal.id == MealImage.meal_id).filter(
+        MealImage.meal_id == meal_id,
+        Meal.user_id == user_id
+    ).first()
+
+
+def image_etag(image, size):
+    """Strong ETag - an image's bytes never change once it is stored"""
+    return f'{image.meal_id}-{size}-{int(image.created_at.timestamp() * 1000)}'
+
+
+def load_image_bytes(image, size):
+    """(bytes, mime_type) of one size of image, rendering a missing variant once"""
+    if size == 'detail':
+        data = db.session.query(MealImage.data).filter(MealImage.meal_id == image.meal_id).scalar()
+        return data, image.mime_type
+
+    variant = MealImageVariant.query.filter_by(meal_id=image.meal_id, variant=size).options(
+        undefer(MealImageVariant.data)).first()
+    if variant:
+        return variant.data, variant.mime_type
+
+    original = db.session.query(MealImage.data).filter(MealImage.meal_id == image.meal_id).scalar()
+    try:
+        data = _render_variant(original, VARIANTS[size])
+    except Exception:
+        return original, image.mime_type
+    try:
+        db.session.add(MealImageVariant(meal_id=image.meal_id, variant=size, data=data))
+        db.session.commit()
+    except Exception:
+        # e.g. a concurrent request stored it first
+        db.session.rollback()
+    return data, 'image/jpeg'
+
+
+def migrate_legacy_images():
+    """Copy thumbnails from the old meal.image_data column into MealImage.
+
+    Idempotent and safe to run on every start: does nothing on databases
+    created without that column or once it has been emptied. Returns the
+    number of images moved.
+    """
+    columns = {c['name'] for c in inspect(db.engine).get_columns('meal')}
+    if 'image_data' not in columns:
+        return 0
+
+    moved = db.session.execute(text(
+        "INSERT INTO meal_image (meal_id, mime_type, data, created_at) "
+        "SELECT id, 'image/jpeg', image_data, logged_at FROM meal "
+        "WHERE image_data IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM meal_image WHERE meal_image.meal_id = meal.id)"
+    )).rowcount
+    db.session.execute(text(
+        "UPDATE meal SET image_data = NULL "
+        "WHERE image_data IS NOT NULL "
+        "AND EXISTS (SELECT 1 FROM meal_image WHERE meal_image.meal_id = meal.id)"
+    ))
+    db.session.commit()
+    return moved
@@ -0,0 +1,164 @@
+"""
+Background execution of meal analysis so sync workers aren't held for the
+whole Gemini round trip.
+
+The POST handler records an AnalysisJob row and hands the work to a small
+in-process thread pool, then returns immediately. Job state lives in the
+database, so the client can poll (or stream) from any gunicorn worker.
+"""
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import func, and_, or_
+from app.extensions import db
+from app.models import AnalysisJob
+from config import Config
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _reset_executor_after_fork():
+    # Worker threads don't survive fork - each worker builds its own pool
+    global _executor
+    _executor = None
+
+
+os.register_at_fork(after_in_child=_reset_executor_after_fork)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=Config.ANALYSIS_JOB_WORKERS,
+                    thread_name_prefix='analysis-job'
+                )
+    return _executor
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+def _finish(job_id, **values):
+    """Record the outcome unless the job was expired in the meantime"""
+    AnalysisJob.query.filter_by(id=job_id, status='running').update(
+        dict(values, finished_at=_utcnow()), synchronize_session=False)
+    db.session.commit()
+
+
+def _run(app, job_id, fn, args, describe_error):
+    with app.app_context():
+        try:
+            # Claim the job - skip it if expire_lost_jobs already failed it
+            claimed = AnalysisJob.query.filter_by(id=job_id, status='queued').update(
+                {'status': 'running', 'started_at': _utcnow()}, synchronize_session=False)
+            db.session.commit()
+            if not claimed:
+                return
+
+            try:
+                result = fn(*args)
+            except Exception as e:
+                db.session.rollback()
+                _finish(job_id, status='error', error=describe_error(e))
+            else:
+                _finish(job_id, status='done', result=json.dumps(result))
+        finally:
+            db.session.remove()
+
+
+def submit_job(app, user_id, kind, fn, args, describe_error=str):
+    """Record a job and run fn(*args) on the pool. Returns the job id.
+
+    fn runs inside an app context and must return something JSON-serializable;
+    describe_error turns an exception into the message stored on the job.
+    """
+    job = AnalysisJob(id=uuid.uuid4().hex, user_id=user_id, kind=kind)
+    db.session.add(job)
+    db.session.commit()
+
+    _get_executor().submit(_run, app, job.id, fn, args, describe_error)
+    return job.id
+
+
+def max_job_seconds():
+    """Longest a job can stay unfinished before expire_lost_jobs fails it"""
+    return Config.ANALYSIS_JOB_QUEUE_TIMEOUT + Config.ANALYSIS_JOB_TIMEOUT
+
+
+def job_to_dict(job):
+    data = {
+        'job_id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'created_at': job.created_at.isoformat()
+    }
+    if job.status == 'done':
+        data['result'] = json.loads(job.result)
+    elif job.status == 'error':
+        data['error'] = job.error
+    return data
+
+
+def expire_lost_jobs():
+    """Fail jobs whose worker died before finishing them.
+
+    Running jobs are timed from when they started; queued jobs may
+    legitimately wait behind a busy pool, so they get a longer bound.
+    """
+    now = _utcnow()
+    lost = AnalysisJob.query.filter(or_(
+        and_(AnalysisJob.status == 'running',
+             AnalysisJob.started_at < now - timedelta(seconds=Config.ANALYSIS_JOB_TIMEOUT)),
+        and_(AnalysisJob.status == 'queued',
+             AnalysisJob.created_at < now - timedelta(seconds=Config.ANALYSIS_JOB_QUEUE_TIMEOUT))
+    )).update({'status': 'error', 'error': 'Analysis timed out', 'finished_at': _utcnow()},
+             synchronize_session=False)
+    if lost:
+        db.session.commit()
+
+
+def purge_old_jobs():
+    """Drop finished jobs nobody will poll any more"""
+    cutoff = _utcnow() - timedelta(seconds=Config.ANALYSIS_JOB_RETENTION)
+    AnalysisJob.query.filter(AnalysisJob.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def job_metrics():
+    """Queue depth and wait-time stats across all workers"""
+    depth = dict(db.session.query(AnalysisJob.status, func.count(AnalysisJob.id))
+                 .filter(AnalysisJob.status.in_(('queued', 'running')))
+                 .group_by(AnalysisJob.status).all())
+
+    recent = AnalysisJob.query.filter(AnalysisJob.started_at.isnot(None)) \
+        .order_by(AnalysisJob.created_at.desc()).limit(200).all()
+
+    def seconds(a, b):
+        # SQLite hands back naive datetimes - compare everything as naive UTC
+        return (a.replace(tzinfo=None) - b.replace(tzinfo=None)).total_seconds()
+
+    waits = sorted(seconds(j.started_at, j.created_at) for j in recent)
+    runs = sorted(seconds(j.finished_at, j.started_at) for j in recent if j.finished_at)
+
+    def percentile(values, pct):
+        if not values:
+            return 0
+        return round(values[min(len(values) - 1, int(len(values) * pct))], 3)
+
+    return {
+        'queued': depth.get('queued', 0),
+        'running': depth.get('running', 0),
+        'workers_per_process': Config.ANALYSIS_JOB_WORKERS,
+        'wait_seconds': {'p50': percentile(waits, 0.5), 'p95': percentile(waits, 0.95)},
+        'run_seconds': {'p50': percentile(runs, 0.5), 'p95': percentile(runs, 0.95)},
+        'sample_size': len(recent)
+    }
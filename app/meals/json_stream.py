@@ -0,0 +1,64 @@
+"""
+Incremental parser for a JSON array of objects arriving in chunks.
+
+Streaming LLM output is a growing string like '[{"name": "Oat'... We can't
+json.loads it until the very end, but each top-level object is complete
+as soon as its closing brace arrives. JsonArrayStream scans the text once,
+tracking string/escape state and brace depth, and hands back each object
+the moment it closes.
+"""
+import json
+
+
+class JsonArrayStream:
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0
+        self._started = False  # Seen the opening '['
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start = None
+
+    def feed(self, chunk):
+        """Add text; return a list of objects completed by it (possibly empty)"""
+        self._buffer += chunk
+        completed = []
+
+        while self._pos < len(self._buffer):
+            ch = self._buffer[self._pos]
+
+            if not self._started:
+                # Skip markdown fences or preamble before the array
+                if ch == '[':
+                    self._started = True
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == '{':
+                if self._depth == 0:
+                    self._object_start = self._pos
+                self._depth += 1
+            elif ch == '}':
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    text = self._buffer[self._object_start:self._pos + 1]
+                    completed.append(json.loads(text))
+                    self._object_start = None
+
+            self._pos += 1
+
+        # Drop consumed text we'll never need again
+        keep_from = self._object_start if self._object_start is not None else self._pos
+        self._buffer = self._buffer[keep_from:]
+        self._pos -= keep_from
+        if self._object_start is not None:
+            self._object_start = 0
+
+        return completed
@@ -0,0 +1,203 @@
+"""
+Offline nutrition lookup for common foods.
+
+A small bundled food composition table (data/foods.csv, values per 100g
+plus a typical serving and cup weight) is loaded once per process into a
+prefix trie over food names and aliases, with a trigram index for typo
+tolerant matching. Text queries for staple foods are answered here in
+well under a millisecond; anything unknown falls back to Gemini.
+
+Fuzzy matching only corrects typos word by word. A query with extra or
+different words ("apple pie", "chocolate cake") is never matched to one
+of its ingredients - it goes to Gemini instead.
+"""
+import csv
+import os
+import threading
+from difflib import SequenceMatcher
+
+from app.meals.food_query import normalize_text, format_portion, _singular
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'foods.csv')
+
+# Minimum trigram similarity for a fuzzy match to be trusted
+FUZZY_THRESHOLD = 0.6
+# Minimum similarity of each query word to the food word in the same position
+WORD_THRESHOLD = 0.8
+
+# Units that mean "one typical serving" of the food
+SERVING_UNITS = {'unit', 'serving', 'piece'}
+# Units that only make sense if the serving is described that way ('1 slice', '1 can')
+NAMED_SERVING_UNITS = {'slice', 'glass', 'can', 'bowl', 'handful'}
+CUP_FRACTIONS = {'cup': 1, 'tbsp': 1 / 16, 'tsp': 1 / 48}
+
+
+class FoodTrie:
+    """Prefix trie mapping normalized names to food ids"""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, key, food_id):
+        node = self.root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node['$'] = food_id
+
+    def _node(self, prefix):
+        node = self.root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def get(self, key):
+        node = self._node(key)
+        return node.get('$') if node else None
+
+    def with_prefix(self, prefix, limit=10):
+        """Food ids for keys starting with prefix, shortest keys first"""
+        node = self._node(prefix)
+        if node is None:
+            return []
+        found = []
+        frontier = [node]
+        while frontier and len(found) < limit:
+            next_frontier = []
+            for current in frontier:
+                for ch, child in sorted(current.items()):
+                    if ch == '$':
+                        if child not in found:
+                            found.append(child)
+                    else:
+                        next_frontier.append(child)
+            frontier = next_frontier
+        return found[:limit]
+
+
+def _key(text):
+    return ' '.join(_singular(word) for word in normalize_text(text).split())
+
+
+def _same_words(key, candidate):
+    """True if candidate spells the same words as key, allowing for typos in each"""
+    words, candidate_words = key.split(), candidate.split()
+    if len(words) != len(candidate_words):
+        return False
+    return all(word == other or SequenceMatcher(None, word, other).ratio() >= WORD_THRESHOLD
+               for word, other in zip(words, candidate_words))
+
+
+def _trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NutritionIndex:
+    def __init__(self, path=DATA_PATH):
+        self.foods = []
+        self.trie = FoodTrie()
+        self.trigram_index = {}
+        self.key_trigrams = {}
+
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                food_id = len(self.foods)
+                self.foods.append(row)
+                names = [row['name']] + [a for a in row['aliases'].split('|') if a]
+                for name in names:
+                    key = _key(name)
+                    self.trie.insert(key, food_id)
+                    grams = _trigrams(key)
+                    self.key_trigrams[key] = (food_id, grams)
+                    for gram in grams:
+                        self.trigram_index.setdefault(gram, set()).add(key)
+
+    def match(self, base_food):
+        """Return (food_row, confidence) for a normalized base food, or (None, 0)"""
+        key = _key(base_food)
+        food_id = self.trie.get(key)
+        if food_id is not None:
+            return self.foods[food_id], 1.0
+
+        grams = _trigrams(key)
+        candidates = set()
+        for gram in grams:
+            candidates |= self.trigram_index.get(gram, set())
+
+        best_id, best_score = None, 0
+        for candidate in candidates:
+            if not _same_words(key, candidate):
+                continue
+            candidate_id, candidate_grams = self.key_trigrams[candidate]
+            score = len(grams & candidate_grams) / len(grams | candidate_grams)
+            if score > best_score:
+                best_id, best_score = candidate_id, score
+
+        if best_score >= FUZZY_THRESHOLD:
+            return self.foods[best_id], best_score
+        return None, 0
+
+    def complete(self, prefix, limit=10):
+        """Food names starting with prefix (for autocomplete)"""
+        return [self.foods[i]['name'] for i in self.trie.with_prefix(_key(prefix), limit)]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NutritionIndex()
+    return _index
+
+
+def _grams_for(food, quantity, unit):
+    """Convert a parsed quantity to grams of this food, or None if we can't"""
+    if unit in ('g', 'ml'):
+        return quantity  # ml treated as ~1g/ml - good enough for drinks and soups
+    if unit in SERVING_UNITS or (unit in NAMED_SERVING_UNITS and unit in food['serving_name']):
+        return quantity * float(food['serving_grams'])
+    if unit in CUP_FRACTIONS and food['cup_grams']:
+        return quantity * CUP_FRACTIONS[unit] * float(food['cup_grams'])
+    return None
+
+
+def lookup_food(quantity, unit, base_food):
+    """Nutrition for a parsed query in the same shape as analyze_food_text, or None"""
+    food, _ = get_index().match(base_food)
+    if food is None:
+        return None
+
+    grams = _grams_for(food, quantity, unit)
+    if grams is None:
+        return None
+
+    serving_name = food['serving_name']
+    if unit in SERVING_UNITS or unit in NAMED_SERVING_UNITS:
+        if quantity == 1:
+            portion = serving_name
+        elif serving_name.startswith('1 '):
+            portion = f'{round(quantity, 2):g} {serving_name[2:]}'  # '2 large egg'
+        else:
+            portion = f'{round(quantity, 2):g} x {serving_name}'
+    else:
+        portion = format_portion(quantity, unit, base_food)
+
+    factor = grams / 100
+    return {
+        'food_name': food['name'].capitalize(),
+        'calories': round(float(food['calories']) * factor, 1),
+        'protein': round(float(food['protein']) * factor, 1),
+        'carbs': round(float(food['carbs']) * factor, 1),
+        'fat': round(float(food['fat']) * factor, 1),
+        'food_score': int(food['food_score']),
+        'health_benefits': [b for b in food['health_benefits'].split('|') if b],
+        'health_negatives': [n for n in food['health_negatives'].split('|') if n],
+        'portion_estimate': portion
+    }
@@ -0,0 +1,252 @@
+"""
+Deadline, retries, hedging and a circuit breaker for upstream (Gemini) calls.
+
+Each call gets an overall deadline. Failed attempts that look transient are
+retried with exponential backoff and full jitter while the deadline allows.
+With hedging on, an attempt still running after the observed p95 latency
+gets a second copy racing it, and whichever finishes first wins. Retryable
+failures trip a per-worker circuit breaker. While it is open, calls fail
+immediately instead of tying up request threads on a degraded upstream.
+After a cool-down, a single probe call decides whether to close it again.
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+
+from config import Config
+
+LATENCY_SAMPLES = 200
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when an upstream call is refused or gives up without an answer"""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """Raised instead of calling upstream while the circuit breaker is open"""
+
+
+class DeadlineExceeded(UpstreamUnavailable):
+    """Raised when no attempt finished within the call's deadline"""
+
+
+class CircuitBreaker:
+    """closed -> open after failure_threshold consecutive failures,
+    open -> half_open after reset_timeout, half_open -> closed/open on one probe."""
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open':
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = 'half_open'
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def retry_after(self):
+        """Seconds until an open breaker lets a probe through"""
+        with self._lock:
+            if self.state != 'open':
+                return 0
+            return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0)
+
+
+class ResilientCaller:
+    """Runs zero-argument callables against one upstream with the policy above.
+
+    is_retryable(exc) decides which exceptions mean "upstream is unhealthy,
+    try again"; anything else is raised to the caller straight away.
+    """
+
+    def __init__(self, name, is_retryable):
+        self.name = name
+        self.is_retryable = is_retryable
+        self.breaker = CircuitBreaker(Config.GEMINI_BREAKER_FAILURES, Config.GEMINI_BREAKER_RESET_SECONDS)
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._counts = {'calls': 0, 'retries': 0, 'hedges': 0, 'rejected': 0, 'timeouts': 0, 'failures': 0}
+        self._lock = threading.Lock()
+        self._executor = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # Threads don't survive fork; the breaker and stats are per worker too
+        self._executor = None
+        self._lock = threading.Lock()
+        self._latencies.clear()
+        self._counts = dict.fromkeys(self._counts, 0)
+        self.breaker = CircuitBreaker(Config.GEMINI_BREAKER_FAILURES, Config.GEMINI_BREAKER_RESET_SECONDS)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=Config.GEMINI_MAX_CONNECTIONS,
+                        thread_name_prefix=f'{self.name}-call'
+                    )
+        return self._executor
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def _admit(self):
+        self._count('calls')
+        if not self.breaker.allow():
+            self._count('rejected')
+            raise CircuitOpenError(
+                f'{self.name} is temporarily unavailable '
+                f'(retry in {self.breaker.retry_after():.0f}s)'
+            )
+
+    def percentile(self, p):
+        """p-th percentile of recent successful attempt latencies, in seconds"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(int(len(samples) * p / 100), len(samples) - 1)]
+
+    def _hedge_delay(self):
+        if not Config.GEMINI_HEDGE or len(self._latencies) < Config.GEMINI_HEDGE_MIN_SAMPLES:
+            return None
+        return self.percentile(95)
+
+    def _attempt(self, fn, deadline):
+        """One logical attempt, hedged if enabled. Returns fn()'s result."""
+        executor = self._get_executor()
+        hedge_delay = self._hedge_delay()
+        started = {executor.submit(fn): time.monotonic()}
+        pending = set(started)
+        error = None
+
+        while pending:
+            timeout = deadline - time.monotonic()
+            hedge_now = hedge_delay is not None and len(started) == 1
+            if hedge_now:
+                timeout = min(timeout, hedge_delay)
+            done, pending = wait(pending, timeout=max(timeout, 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is None:
+                    with self._lock:
+                        self._latencies.append(time.monotonic() - started[future])
+                    return future.result()
+                error = error or future.exception()
+
+            if not done:
+                if hedge_now and time.monotonic() < deadline:
+                    self._count('hedges')
+                    hedge = executor.submit(fn)
+                    started[hedge] = time.monotonic()
+                    pending.add(hedge)
+                    continue
+                self._count('timeouts')
+                raise DeadlineExceeded(f'{self.name} did not answer within the deadline')
+
+        raise error
+
+    def call(self, fn):
+        """Call fn() with deadline, retries, hedging and the circuit breaker"""
+        self._admit()
+        deadline = time.monotonic() + Config.GEMINI_CALL_DEADLINE
+
+        attempts = max(Config.GEMINI_MAX_ATTEMPTS, 1)
+        for attempt in range(attempts):
+            try:
+                result = self._attempt(fn, deadline)
+            except Exception as e:
+                if not isinstance(e, DeadlineExceeded) and not self.is_retryable(e):
+                    # Upstream answered, just not with something we can use
+                    self.breaker.record_success()
+                    raise
+                self._count('failures')
+                self.breaker.record_failure()
+                backoff = random.uniform(0, Config.GEMINI_RETRY_BASE_DELAY * 2 ** attempt)
+                last_try = attempt + 1 >= attempts
+                if (last_try or self.breaker.state == 'open'
+                        or time.monotonic() + backoff >= deadline):
+                    raise
+                self._count('retries')
+                time.sleep(backoff)
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    @contextmanager
+    def guard(self):
+        """Breaker-only protection for calls that can't be retried, e.g. streams"""
+        self._admit()
+        failed = False
+        try:
+            yield
+        except DeadlineExceeded:
+            self._count('timeouts')
+            failed = True
+            raise
+        except Exception as e:
+            failed = self.is_retryable(e)
+            raise
+        finally:
+            # Also runs if a stream's consumer goes away mid-way
+            if failed:
+                self._count('failures')
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+    def stats(self):
+        def ms(seconds):
+            return round(seconds * 1000) if seconds is not None else None
+
+        with self._lock:
+            counts = dict(self._counts)
+            samples = len(self._latencies)
+        return {
+            'breaker': {
+                'state': self.breaker.state,
+                'consecutive_failures': self.breaker.failures,
+                'retry_after_seconds': round(self.breaker.retry_after(), 1)
+            },
+            'latency_ms': {
+                'p50': ms(self.percentile(50)),
+                'p95': ms(self.percentile(95)),
+                'p99': ms(self.percentile(99)),
+                'samples': samples
+            },
+            'hedge_after_ms': ms(self._hedge_delay()),
+            **counts
+        }
@@ -1,14 +1,30 @@
 import json
 import base64
+import time
 from datetime import datetime, timezone, timedelta
-from flask import request, jsonify
+from flask import request, jsonify, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
 from app.extensions import db
-from app.models import Meal
+from app.models import Meal, AnalysisJob
 from app.meals import meals_bp
-from app.meals.gemini_service import analyze_food_image, get_meal_suggestions, analyze_food_text
-from PIL import Image
-import io
+from app.meals.gemini_service import (stream_meal_suggestions, analyze_food_batch, upstream_stats,
+                                     GeminiNotConfigured)
+from app.meals.resilience import UpstreamUnavailable, DeadlineExceeded
+from app.meals.analysis_cache import (analyze_food_image_cached, image_cache_keys, lookup_image_analysis,
+                                      store_image_analysis, cache_stats as image_cache_stats)
+from app.meals.text_cache import (analyze_food_text_cached, lookup_food_text, store_food_text,
+                                  cache_stats as text_cache_stats)
+from app.meals.image_pipeline import prepare_image
+from app.meals.image_store import (has_image_column, attach_image, attach_staged_image, stage_image, find_image,
+                                   image_etag, image_url, load_image_bytes, SIZES as IMAGE_SIZES)
+from app.meals.nutrition_db import get_index as get_nutrition_index
+from app.meals.suggestion_cache import (get_suggestions_cached, lookup_suggestions, store_suggestions,
+                                        invalidate_suggestions, prefetch_suggestions,
+                                        cache_stats as suggestion_cache_stats)
+from app.meals.daily_rollup import apply_meal, get_day, local_today
+from app.versions import conditional, bump, MEALS
+from app.meals.jobs import (submit_job, job_to_dict, expire_lost_jobs, purge_old_jobs, job_metrics,
+                            max_job_seconds)
 
 
 def get_today_range(tz_offset_minutes=0):
@@ -19,6 +35,54 @@ def get_today_range(tz_offset_minutes=0):
     return start, end
 
 
+def _analyze_image(user_id, image_bytes, mime_type):
+    """Full photo analysis: preprocess, (cached) Gemini call, staged thumbnail."""
+    # Decode once: model-sized input, stored thumbnail and cache phash
+    prepared = prepare_image(image_bytes, mime_type)
+    result, cache_status = analyze_food_image_cached(
+        prepared.model_bytes, prepared.model_mime, phash=prepared.phash
+    )
+    # /log attaches the thumbnail by token instead of receiving it back.
+    # Build a new dict: result may be shared with coalesced callers.
+    return dict(
+        result,
+        cached=cache_status != 'miss',
+        cache_status=cache_status,
+        thumbnail_token=stage_image(user_id, prepared.thumbnail_bytes) if prepared.thumbnail_bytes else None
+    )
+
+
+def _analyze_text(query):
+    """Text analysis: offline database, per-unit cache, then Gemini."""
+    result, cache_status = analyze_food_text_cached(query)
+    return dict(result, cached=cache_status in ('hit', 'local'), cache_status=cache_status)
+
+
+def _analysis_error_message(e):
+    if isinstance(e, GeminiNotConfigured):
+        return 'Gemini API key not configured. Edit the .env file in the project root.'
+    if isinstance(e, UpstreamUnavailable):
+        return f'AI analysis is temporarily unavailable, please try again shortly. ({str(e)})'
+    if isinstance(e, json.JSONDecodeError):
+        return 'Could not parse AI response. Please try again.'
+    return f'Analysis failed: {str(e)}'
+
+
+def _wants_job():
+    return request.args.get('mode') == 'async'
+
+
+def _job_accepted(job_id):
+    return jsonify(
+        job_id=job_id,
+        status='queued',
+        status_url=f'/api/meals/jobs/{job_id}',
+        events_url=f'/api/meals/jobs/{job_id}/events',
+        # How long the client should keep waiting: the job is failed server-side by then
+        timeout_seconds=max_job_seconds()
+    ), 202
+
+
 @meals_bp.route('/analyze', methods=['POST'])
 @login_required
 def analyze():
@@ -32,34 +96,18 @@ def analyze():
     if not image_bytes:
         return jsonify(error=True, message='Empty image file'), 400
 
-    try:
-        import os
-        api_key = os.environ.get('GEMINI_API_KEY', '')
-        if not api_key or api_key == 'PASTE_YOUR_GEMINI_API_KEY_HERE':
-            return jsonify(error=True, message='Gemini API key not configured. Edit the .env file in the project root.'), 500
-
-        result = analyze_food_image(image_bytes, mime_type)
+    if _wants_job():
+        job_id = submit_job(current_app._get_current_object(), current_user.id, 'image',
+                            _analyze_image, (current_user.id, image_bytes, mime_type), _analysis_error_message)
+        return _job_accepted(job_id)
 
-        # Create a compressed thumbnail for storage
-        thumbnail_b64 = None
-        try:
-            img = Image.open(io.BytesIO(image_bytes))
-            img.thumbnail((300, 300))
-            buf = io.BytesIO()
-            img.save(buf, format='JPEG', quality=60)
-            thumbnail_b64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-        except Exception:
-            pass
-
-        result['thumbnail'] = thumbnail_b64
-        return jsonify(result)
-
-    except json.JSONDecodeError:
-        return jsonify(error=True, message='Could not parse AI response. Please try again.'), 500
+    try:
+        return jsonify(_analyze_image(current_user.id, image_bytes, mime_type))
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return jsonify(error=True, message=f'Analysis failed: {str(e)}'), 500
+        if not isinstance(e, (GeminiNotConfigured, json.JSONDecodeError)):
+            import traceback
+            traceback.print_exc()
+        return jsonify(error=True, message=_analysis_error_message(e)), 500
 
 
 @meals_bp.route('/log', methods=['POST'])
@@ -70,14 +118,6 @@ def log_meal():
     if not data or 'food_name' not in data or 'calories' not in data:
         return jsonify(error=True, message='Missing required fields'), 400
 
-    # Decode thumbnail if provided
-    image_data = None
-    if data.get('thumbnail'):
-        try:
-            image_data = base64.b64decode(data['thumbnail'])
-        except Exception:
-            pass
-
     meal = Meal(
         user_id=current_user.id,
         food_name=data['food_name'],
@@ -88,7 +128,6 @@ def log_meal():
         food_score=int(data.get('food_score', 5)),
         health_benefits=json.dumps(data.get('health_benefits', [])),
         health_negatives=json.dumps(data.get('health_negatives', [])),
-        image_data=image_data,
         portion_multiplier=float(data.get('portion_multiplier', 1.0)),
         original_portion=data.get('original_portion'),
         original_calories=float(data.get('original_calories')) if data.get('original_calories') else None,
@@ -98,9 +137,23 @@ def log_meal():
         entry_method=data.get('entry_method', 'photo')
     )
 
+    # Attach the thumbnail staged by /analyze (or, from older clients, sent inline)
+    if data.get('thumbnail_token'):
+        attach_staged_image(meal, data['thumbnail_token'], current_user.id)
+    elif data.get('thumbnail'):
+        try:
+            attach_image(meal, base64.b64decode(data['thumbnail']))
+        except Exception:
+            pass
+
     db.session.add(meal)
+    apply_meal(meal)
+    invalidate_suggestions(current_user.id)
+    bump(MEALS, current_user.id)
     db.session.commit()
 
+    _prefetch_suggestions(request.args.get('tz_offset', 0, type=int))
+
     return jsonify(success=True, meal_id=meal.id)
 
 
@@ -117,43 +170,147 @@ def analyze_text():
     if not query:
         return jsonify(error=True, message='Query cannot be empty'), 400
 
-    try:
-        import os
-        api_key = os.environ.get('GEMINI_API_KEY', '')
-        if not api_key or api_key == 'PASTE_YOUR_GEMINI_API_KEY_HERE':
-            return jsonify(error=True, message='Gemini API key not configured'), 500
+    if _wants_job():
+        job_id = submit_job(current_app._get_current_object(), current_user.id, 'text',
+                            _analyze_text, (query,), _analysis_error_message)
+        return _job_accepted(job_id)
 
-        result = analyze_food_text(query)
-        return jsonify(result)
+    try:
+        # Staple foods resolve offline; the API key is only needed for Gemini
+        return jsonify(_analyze_text(query))
+    except Exception as e:
+        if not isinstance(e, (GeminiNotConfigured, json.JSONDecodeError)):
+            import traceback
+            traceback.print_exc()
+        return jsonify(error=True, message=_analysis_error_message(e)), 500
+
+
+def _analyze_batch(user_id, images, queries):
+    """Analyze photos and text entries with as few Gemini calls as possible.
+
+    Cached / locally known items are answered first; the rest are packed
+    into analyze_food_batch calls of up to BATCH_ITEMS_PER_CALL items.
+    """
+    entries = []
+    for image_bytes, mime_type in images:
+        prepared = prepare_image(image_bytes, mime_type)
+        content_hash, phash = image_cache_keys(prepared.model_bytes, prepared.phash)
+        result, cache_status = lookup_image_analysis(content_hash, phash)
+        entries.append({'type': 'image', 'prepared': prepared, 'keys': (content_hash, phash),
+                        'result': result, 'cache_status': cache_status})
+    for query in queries:
+        result, cache_status = lookup_food_text(query)
+        entries.append({'type': 'text', 'query': query, 'result': result, 'cache_status': cache_status})
+
+    pending = [e for e in entries if e['result'] is None]
+    chunk_size = current_app.config['BATCH_ITEMS_PER_CALL']
+    model_calls = 0
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        items = [{'image': e['prepared'].model_bytes, 'mime_type': e['prepared'].model_mime}
+                 if e['type'] == 'image' else {'query': e['query']} for e in chunk]
+        model_calls += 1
+        try:
+            answers = analyze_food_batch(items)
+        except Exception as e:
+            answers = [{'error': _analysis_error_message(e)}] * len(chunk)
+
+        for entry, answer in zip(chunk, answers):
+            if 'error' in answer:
+                entry['error'] = answer['error']
+                continue
+            entry['result'] = answer
+            if entry['type'] == 'image':
+                store_image_analysis(*entry['keys'], answer)
+            elif entry['cache_status'] == 'miss':
+                store_food_text(entry['query'], answer)
+
+    results = []
+    for index, entry in enumerate(entries):
+        item = {'index': index, 'type': entry['type']}
+        if entry['type'] == 'text':
+            item['query'] = entry['query']
+        if entry['result'] is None:
+            item.update(error=True, message=entry.get('error', 'Analysis failed'))
+        else:
+            result = dict(entry['result'])
+            result['cached'] = entry['cache_status'] in ('hit', 'near_hit', 'local')
+            result['cache_status'] = entry['cache_status']
+            if entry['type'] == 'image' and entry['prepared'].thumbnail_bytes:
+                result['thumbnail_token'] = stage_image(user_id, entry['prepared'].thumbnail_bytes)
+            item['result'] = result
+        results.append(item)
+
+    return {'results': results, 'model_calls': model_calls}
+
+
+@meals_bp.route('/analyze-batch', methods=['POST'])
+@login_required
+def analyze_batch():
+    """Analyze several photos (multipart 'images') and/or text entries
+    (form fields or JSON array 'items') in one request.
+
+    Results come back per item, in input order (photos first, then text),
+    each with either 'result' or 'error'.
+    """
+    images = []
+    for file in request.files.getlist('images'):
+        image_bytes = file.read()
+        if image_bytes:
+            images.append((image_bytes, file.content_type or 'image/jpeg'))
+
+    if request.is_json:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify(error=True, message='Request body must be a JSON object'), 400
+        queries = data.get('items', [])
+        if not isinstance(queries, list) or not all(isinstance(q, str) and q.strip() for q in queries):
+            return jsonify(error=True, message="'items' must be a list of non-empty strings"), 400
+    else:
+        queries = [q for q in request.form.getlist('items') if q.strip()]
+    queries = [q.strip() for q in queries]
+
+    total = len(images) + len(queries)
+    if total == 0:
+        return jsonify(error=True, message='No images or items provided'), 400
+    if total > current_app.config['BATCH_MAX_ITEMS']:
+        return jsonify(error=True, message=f"At most {current_app.config['BATCH_MAX_ITEMS']} items per batch"), 400
+
+    if _wants_job():
+        job_id = submit_job(current_app._get_current_object(), current_user.id, 'batch',
+                            _analyze_batch, (current_user.id, images, queries), _analysis_error_message)
+        return _job_accepted(job_id)
 
-    except json.JSONDecodeError:
-        return jsonify(error=True, message='Could not parse AI response'), 500
+    try:
+        return jsonify(_analyze_batch(current_user.id, images, queries))
     except Exception as e:
         import traceback
         traceback.print_exc()
-        return jsonify(error=True, message=f'Analysis failed: {str(e)}'), 500
+        return jsonify(error=True, message=_analysis_error_message(e)), 500
 
 
-@meals_bp.route('/today', methods=['GET'])
-@login_required
-def today():
-    tz_offset = request.args.get('tz_offset', 0, type=int)
+def local_day_key():
+    """ETag component for views about 'today': they change at local midnight without any write"""
+    return local_today(request.args.get('tz_offset', 0, type=int)).isoformat()
+
+
+def today_payload(user, tz_offset, totals=None):
+    """Today's meals and totals as returned by /today (pass totals if already loaded)."""
     start, end = get_today_range(tz_offset)
 
-    meals = Meal.query.filter(
-        Meal.user_id == current_user.id,
+    rows = db.session.query(Meal, has_image_column()).filter(
+        Meal.user_id == user.id,
         Meal.logged_at >= start,
         Meal.logged_at < end
     ).order_by(Meal.logged_at.desc()).all()
 
-    total_cal = sum(m.calories for m in meals)
-    total_protein = sum(m.protein for m in meals)
-    total_carbs = sum(m.carbs for m in meals)
-    total_fat = sum(m.fat for m in meals)
-    target = current_user.daily_calorie_target
+    if totals is None:
+        totals = get_day(user.id, local_today(tz_offset))
+    total_cal = totals['total_calories']
+    target = user.daily_calorie_target
 
     meals_data = []
-    for m in meals:
+    for m, has_image in rows:
         meal_dict = {
             'id': m.id,
             'food_name': m.food_name,
@@ -165,21 +322,30 @@ def today():
             'health_benefits': json.loads(m.health_benefits),
             'health_negatives': json.loads(m.health_negatives),
             'logged_at': m.logged_at.isoformat(),
-            'has_image': m.image_data is not None
+            'has_image': bool(has_image),
+            'image_url': image_url(m, 'icon') if has_image else None
         }
         meals_data.append(meal_dict)
 
-    return jsonify(
+    return dict(
         meals=meals_data,
-        total_calories=round(total_cal, 1),
-        total_protein=round(total_protein, 1),
-        total_carbs=round(total_carbs, 1),
-        total_fat=round(total_fat, 1),
+        total_calories=total_cal,
+        total_protein=totals['total_protein'],
+        total_carbs=totals['total_carbs'],
+        total_fat=totals['total_fat'],
         target=target,
         progress_pct=round((total_cal / target) * 100, 1) if target > 0 else 0
     )
 
 
+@meals_bp.route('/today', methods=['GET'])
+@login_required
+@conditional(MEALS, vary=local_day_key)
+def today():
+    tz_offset = request.args.get('tz_offset', 0, type=int)
+    return jsonify(today_payload(current_user, tz_offset))
+
+
 @meals_bp.route('/<int:meal_id>', methods=['DELETE'])
 @login_required
 def delete_meal(meal_id):
@@ -187,7 +353,10 @@ def delete_meal(meal_id):
     if not meal:
         return jsonify(error=True, message='Meal not found'), 404
 
+    apply_meal(meal, -1)
     db.session.delete(meal)
+    invalidate_suggestions(current_user.id)
+    bump(MEALS, current_user.id)
     db.session.commit()
     return jsonify(success=True)
 
@@ -195,30 +364,167 @@ def delete_meal(meal_id):
 @meals_bp.route('/image/<int:meal_id>', methods=['GET'])
 @login_required
 def get_meal_image(meal_id):
-    meal = Meal.query.filter_by(id=meal_id, user_id=current_user.id).first()
-    if not meal or not meal.image_data:
+    """Raw image bytes; ?size=detail (default) or one of the smaller variants."""
+    size = request.args.get('size', 'detail')
+    if size not in IMAGE_SIZES:
+        return jsonify(error=True, message=f'Unknown size, expected one of: {", ".join(IMAGE_SIZES)}'), 400
+
+    image = find_image(meal_id, current_user.id)
+    if not image:
         return jsonify(error=True, message='Image not found'), 404
 
-    return base64.b64encode(meal.image_data).decode('utf-8')
+    etag = image_etag(image, size)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        data, mime_type = load_image_bytes(image, size)
+        response = Response(data, mimetype=mime_type)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
 
 
-@meals_bp.route('/suggest', methods=['GET'])
-@login_required
-def suggest():
-    remaining = request.args.get('remaining_cal', 500, type=int)
-    tz_offset = request.args.get('tz_offset', 0, type=int)
+def _recent_meal_names(tz_offset):
     start, end = get_today_range(tz_offset)
-
-    recent = Meal.query.filter(
+    recent = db.session.query(Meal.food_name).filter(
         Meal.user_id == current_user.id,
         Meal.logged_at >= start,
         Meal.logged_at < end
     ).all()
+    return [name for (name,) in recent]
+
+
+def _prefetch_suggestions(tz_offset):
+    """Warm the suggestion cache for the dashboard the user is about to open."""
+    totals = get_day(current_user.id, local_today(tz_offset))
+    remaining = (current_user.daily_calorie_target or 2000) - totals['total_calories']
+    prefetch_suggestions(current_app._get_current_object(), current_user.id,
+                         round(remaining), _recent_meal_names(tz_offset))
 
-    recent_names = [m.food_name for m in recent]
+
+@meals_bp.route('/suggest', methods=['GET'])
+@login_required
+def suggest():
+    remaining = request.args.get('remaining_cal', 500, type=int)
+    tz_offset = request.args.get('tz_offset', 0, type=int)
+    recent_names = _recent_meal_names(tz_offset)
 
     try:
-        suggestions = get_meal_suggestions(remaining, recent_names)
-        return jsonify(suggestions=suggestions)
+        suggestions, cache_status = get_suggestions_cached(current_user.id, remaining, recent_names)
+        return jsonify(suggestions=suggestions, cache=cache_status)
     except Exception as e:
         return jsonify(error=True, message=f'Suggestions failed: {str(e)}'), 500
+
+
+@meals_bp.route('/suggest/stream', methods=['GET'])
+@login_required
+def suggest_stream():
+    """Server-Sent Events: one 'suggestion' event per meal as soon as the
+    model has generated it (or straight from the cache), then 'done' (or 'error')."""
+    remaining = request.args.get('remaining_cal', 500, type=int)
+    tz_offset = request.args.get('tz_offset', 0, type=int)
+    user_id = current_user.id
+    recent_names = _recent_meal_names(tz_offset)
+    cached, bucket, key = lookup_suggestions(user_id, remaining, recent_names)
+
+    def stream():
+        try:
+            if cached is not None:
+                for suggestion in cached:
+                    yield f'event: suggestion\ndata: {json.dumps(suggestion)}\n\n'
+                yield 'event: done\ndata: {"cache": "hit"}\n\n'
+                return
+
+            suggestions = []
+            try:
+                for suggestion in stream_meal_suggestions(bucket, recent_names):
+                    suggestions.append(suggestion)
+                    yield f'event: suggestion\ndata: {json.dumps(suggestion)}\n\n'
+            except DeadlineExceeded:
+                # Keep what arrived in time, but don't cache a partial list
+                yield 'event: done\ndata: {"cache": "miss", "truncated": true}\n\n'
+                return
+            store_suggestions(user_id, bucket, key, suggestions)
+            yield 'event: done\ndata: {"cache": "miss"}\n\n'
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'message': f'Suggestions failed: {str(e)}'})}\n\n"
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@meals_bp.route('/cache/stats', methods=['GET'])
+@login_required
+def analysis_cache_stats():
+    return jsonify(image=image_cache_stats(), text=text_cache_stats(), suggestions=suggestion_cache_stats())
+
+
+@meals_bp.route('/gemini/status', methods=['GET'])
+@login_required
+def gemini_status():
+    """Circuit breaker state and latency percentiles (this worker only)."""
+    return jsonify(upstream_stats())
+
+
+@meals_bp.route('/foods/complete', methods=['GET'])
+@login_required
+def complete_food():
+    """Autocomplete food names from the offline nutrition database."""
+    prefix = request.args.get('prefix', '').strip()
+    if not prefix:
+        return jsonify(foods=[])
+    return jsonify(foods=get_nutrition_index().complete(prefix))
+
+
+@meals_bp.route('/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    job = AnalysisJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify(error=True, message='Job not found'), 404
+    if job.status in ('queued', 'running'):
+        expire_lost_jobs()
+        db.session.refresh(job)
+    return jsonify(job_to_dict(job))
+
+
+@meals_bp.route('/jobs/<job_id>/events', methods=['GET'])
+@login_required
+def job_events(job_id):
+    """Server-Sent Events stream of a job's status until it finishes.
+
+    Each open stream occupies a worker thread; on sync gunicorn workers
+    prefer polling GET /jobs/<id>.
+    """
+    user_id = current_user.id
+    if not AnalysisJob.query.filter_by(id=job_id, user_id=user_id).first():
+        return jsonify(error=True, message='Job not found'), 404
+
+    def stream():
+        last_status = None
+        deadline = time.monotonic() + max_job_seconds()
+        while time.monotonic() < deadline:
+            db.session.expire_all()
+            job = AnalysisJob.query.filter_by(id=job_id, user_id=user_id).first()
+            if job is None:
+                # Purged while we were streaming
+                yield f"event: error\ndata: {json.dumps({'message': 'Job not found'})}\n\n"
+                return
+            if job.status != last_status:
+                last_status = job.status
+                yield f'event: status\ndata: {json.dumps(job_to_dict(job))}\n\n'
+            if job.status in ('done', 'error'):
+                return
+            time.sleep(0.5)
+        yield 'event: timeout\ndata: {}\n\n'
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@meals_bp.route('/jobs/metrics', methods=['GET'])
+@login_required
+def get_job_metrics():
+    expire_lost_jobs()
+    purge_old_jobs()
+    return jsonify(job_metrics())
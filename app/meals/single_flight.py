@@ -0,0 +1,112 @@
+"""
+Single-flight coalescing for identical in-flight Gemini requests.
+
+When several callers ask for the same thing at once (double-taps, PWA
+retries), only the first - the leader - calls upstream; the rest wait for
+its result. Within a worker this is a dict of pending calls guarded by a
+lock. Across gunicorn workers the leader also holds a lease in the shared
+cache store and publishes its result there for followers to pick up.
+"""
+import copy
+import functools
+import threading
+import time
+
+from app import cache_store
+from config import Config
+
+LEASE_PREFIX = 'single_flight:'
+RESULT_PREFIX = 'single_flight_result:'
+POLL_INTERVAL = 0.2
+# Published results are swept at most this often per process, not on every call
+SWEEP_INTERVAL = 60
+
+_last_sweep = 0.0
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_calls = {}
+_calls_lock = threading.Lock()
+
+
+def _sweep_results(max_age):
+    global _last_sweep
+    now = time.monotonic()
+    if now - _last_sweep >= SWEEP_INTERVAL:
+        _last_sweep = now
+        cache_store.delete_older_than(RESULT_PREFIX, max_age)
+
+
+def _run_across_workers(key, fn, args, kwargs):
+    """Run fn as the only caller for key on this host, or reuse another worker's result"""
+    wait_budget = Config.GEMINI_CALL_DEADLINE + 5
+    started = time.time()
+    deadline = time.monotonic() + wait_budget
+
+    while True:
+        if cache_store.acquire_lease(LEASE_PREFIX + key, wait_budget):
+            # Two write transactions in the common case: the lease, then
+            # publishing the result and releasing the lease together
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                cache_store.release_lease(LEASE_PREFIX + key)
+                raise
+            cache_store.put_and_release(RESULT_PREFIX + key, result, LEASE_PREFIX + key)
+            _sweep_results(wait_budget)
+            return result
+
+        # Another worker is on it - wait for its result. If it gives up
+        # without one (error or crash) the lease frees up and we retry.
+        time.sleep(POLL_INTERVAL)
+        published = cache_store.get(RESULT_PREFIX + key)
+        if published and published[1] >= started:
+            return published[0]
+        if time.monotonic() > deadline:
+            return fn(*args, **kwargs)
+
+
+def single_flight(key_fn):
+    """Decorator: coalesce concurrent calls whose key_fn(*args, **kwargs) match.
+
+    Results must be JSON-serializable so they can be shared across workers.
+    Every caller gets its own copy of the result, so one caller mutating it
+    can't leak into another's response.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = f'{fn.__name__}:{key_fn(*args, **kwargs)}'
+
+            with _calls_lock:
+                call = _calls.get(key)
+                leader = call is None
+                if leader:
+                    call = _calls[key] = _Call()
+
+            if not leader:
+                if not call.done.wait(Config.GEMINI_CALL_DEADLINE + 5):
+                    return fn(*args, **kwargs)
+                if call.error is not None:
+                    raise call.error
+                return copy.deepcopy(call.result)
+
+            try:
+                call.result = _run_across_workers(key, fn, args, kwargs)
+                return copy.deepcopy(call.result)
+            except Exception as e:
+                call.error = e
+                raise
+            finally:
+                with _calls_lock:
+                    _calls.pop(key, None)
+                call.done.set()
+
+        return wrapper
+    return decorator
@@ -0,0 +1,115 @@
+"""
+Per-user cache for Gemini meal suggestions.
+
+Suggestions only depend on the remaining calorie budget and what was eaten
+today, so the key is the remaining calories rounded down to
+SUGGESTION_CALORIE_BUCKET plus the set of today's meal names. Logging or
+deleting a meal drops the user's entries; with SUGGESTION_PREFETCH on, the
+next answer is fetched in the background right after a log so the
+dashboard finds it waiting.
+"""
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone, timedelta
+
+from app import cache_store
+from app.extensions import db
+from app.models import SuggestionCache
+from app.meals.gemini_service import get_meal_suggestions
+from config import Config
+
+STATS_PREFIX = 'suggestion_cache:'
+# dashboard.js only asks for suggestions below this many remaining calories
+DASHBOARD_THRESHOLD = 500
+
+
+def calorie_bucket(remaining_calories):
+    """Round down to the bucket size, but never below one bucket"""
+    size = max(Config.SUGGESTION_CALORIE_BUCKET, 1)
+    return max(int(remaining_calories) // size * size, size)
+
+
+def suggestion_key(bucket, recent_meals):
+    names = sorted({name.strip().lower() for name in recent_meals})
+    return hashlib.sha256(json.dumps([bucket, names]).encode('utf-8')).hexdigest()
+
+
+def lookup_suggestions(user_id, remaining_calories, recent_meals):
+    """Return (suggestions, bucket, key); suggestions is None on a miss"""
+    bucket = calorie_bucket(remaining_calories)
+    key = suggestion_key(bucket, recent_meals)
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.SUGGESTION_CACHE_TTL)
+    entry = SuggestionCache.query.filter(
+        SuggestionCache.user_id == user_id,
+        SuggestionCache.cache_key == key,
+        SuggestionCache.created_at >= cutoff
+    ).first()
+
+    cache_store.incr(STATS_PREFIX + ('hit' if entry else 'miss'))
+    return (json.loads(entry.result) if entry else None), bucket, key
+
+
+def store_suggestions(user_id, bucket, key, suggestions):
+    """Remember suggestions for this key (best-effort)"""
+    try:
+        SuggestionCache.query.filter_by(user_id=user_id, cache_key=key).delete()
+        db.session.add(SuggestionCache(
+            user_id=user_id,
+            cache_key=key,
+            calorie_bucket=bucket,
+            result=json.dumps(suggestions)
+        ))
+        db.session.commit()
+    except Exception:
+        # e.g. a concurrent prefetch stored the same key
+        db.session.rollback()
+
+
+def get_suggestions_cached(user_id, remaining_calories, recent_meals):
+    """Cached get_meal_suggestions. Returns (suggestions, 'hit' | 'miss')."""
+    suggestions, bucket, key = lookup_suggestions(user_id, remaining_calories, recent_meals)
+    if suggestions is not None:
+        return suggestions, 'hit'
+
+    suggestions = get_meal_suggestions(bucket, recent_meals)
+    store_suggestions(user_id, bucket, key, suggestions)
+    return suggestions, 'miss'
+
+
+def invalidate_suggestions(user_id):
+    """Drop a user's cached suggestions; call in the same transaction as the meal change"""
+    SuggestionCache.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+
+
+def prefetch_suggestions(app, user_id, remaining_calories, recent_meals):
+    """Warm the cache on a daemon thread if the dashboard is going to ask"""
+    if not Config.SUGGESTION_PREFETCH or not recent_meals:
+        return
+    if not 0 < remaining_calories < DASHBOARD_THRESHOLD:
+        return
+
+    def run():
+        with app.app_context():
+            try:
+                get_suggestions_cached(user_id, remaining_calories, recent_meals)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error prefetching meal suggestions: {str(e)}")
+
+    threading.Thread(target=run, name='suggestion-prefetch', daemon=True).start()
+
+
+def cache_stats():
+    """Hit-rate stats across all workers, plus current cache size"""
+    counts = cache_store.counters(STATS_PREFIX)
+    hits = counts.get(STATS_PREFIX + 'hit', 0)
+    misses = counts.get(STATS_PREFIX + 'miss', 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 3) if total else 0,
+        'entries': SuggestionCache.query.count(),
+        'bucket_calories': Config.SUGGESTION_CALORIE_BUCKET
+    }
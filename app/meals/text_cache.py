@@ -0,0 +1,137 @@
+"""
+Quantity-aware cache in front of Gemini text food analysis.
+
+Staple foods are answered from the bundled nutrition database first
+(see nutrition_db); everything else goes through the cache below.
+
+Queries are normalized to (quantity, unit, base food) and Gemini's answer
+is stored per single unit of the base food. "2 eggs", "two eggs" and
+"3 eggs" then all resolve from the same row, with calories and macros
+scaled by the requested quantity.
+"""
+import json
+from datetime import datetime, timezone, timedelta
+
+from app import cache_store
+from app.extensions import db
+from app.models import FoodTextCache
+from app.meals.food_query import parse_food_query, format_portion
+from app.meals.gemini_service import analyze_food_text
+from app.meals.nutrition_db import lookup_food
+from config import Config
+
+STATS_PREFIX = 'text_analysis_cache:'
+MACROS = ('calories', 'protein', 'carbs', 'fat')
+
+
+def _scaled_result(entry, quantity, unit, base_food):
+    result = {
+        'food_name': entry.food_name,
+        'food_score': entry.food_score,
+        'health_benefits': json.loads(entry.health_benefits),
+        'health_negatives': json.loads(entry.health_negatives),
+        'portion_estimate': format_portion(quantity, unit, base_food)
+    }
+    for field in MACROS:
+        result[field] = round((getattr(entry, field) or 0) * quantity, 1)
+    return result
+
+
+def _store(parsed, result):
+    quantity, unit, base_food = parsed
+    values = {}
+    for field in MACROS:
+        try:
+            values[field] = float(result.get(field, 0)) / quantity
+        except (TypeError, ValueError):
+            return  # Gemini gave us something we can't scale - don't cache it
+
+    db.session.add(FoodTextCache(
+        base_food=base_food,
+        unit=unit,
+        food_name=str(result.get('food_name', base_food))[:200],
+        food_score=int(result.get('food_score', 5)),
+        health_benefits=json.dumps(result.get('health_benefits', [])),
+        health_negatives=json.dumps(result.get('health_negatives', [])),
+        **values
+    ))
+    db.session.commit()
+
+
+def lookup_food_text(query):
+    """Answer a query without Gemini if possible. Returns (result, cache_status).
+
+    result is None on a miss; cache_status is 'local' (bundled nutrition
+    database), 'hit' (scaled from a stored per-unit entry), 'miss' or
+    'uncacheable' (query doesn't reduce to one food and quantity).
+    """
+    parsed = parse_food_query(query)
+    if parsed is None:
+        cache_store.incr(STATS_PREFIX + 'uncacheable')
+        return None, 'uncacheable'
+
+    quantity, unit, base_food = parsed
+    local = lookup_food(quantity, unit, base_food)
+    if local:
+        cache_store.incr(STATS_PREFIX + 'local')
+        return local, 'local'
+
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.ANALYSIS_CACHE_TTL)
+    entry = FoodTextCache.query.filter(
+        FoodTextCache.base_food == base_food,
+        FoodTextCache.unit == unit,
+        FoodTextCache.created_at >= cutoff
+    ).first()
+    if entry:
+        entry.hit_count = (entry.hit_count or 0) + 1
+        db.session.commit()
+        cache_store.incr(STATS_PREFIX + 'hit')
+        return _scaled_result(entry, quantity, unit, base_food), 'hit'
+
+    cache_store.incr(STATS_PREFIX + 'miss')
+    return None, 'miss'
+
+
+def store_food_text(query, result):
+    """Remember Gemini's answer for query as per-unit nutrition (best-effort)"""
+    parsed = parse_food_query(query)
+    if parsed is None:
+        return
+    _, unit, base_food = parsed
+    try:
+        # Replace an expired row for this food, if any
+        FoodTextCache.query.filter_by(base_food=base_food, unit=unit).delete()
+        _store(parsed, result)
+    except Exception:
+        # e.g. a concurrent insert of the same food
+        db.session.rollback()
+
+
+def analyze_food_text_cached(query):
+    """Cached analyze_food_text. Returns (result, cache_status) - see lookup_food_text."""
+    result, cache_status = lookup_food_text(query)
+    if result is not None:
+        return result, cache_status
+
+    result = analyze_food_text(query)
+    if cache_status == 'miss':
+        store_food_text(query, result)
+    return result, cache_status
+
+
+def cache_stats():
+    """Hit-rate stats across all workers, plus current cache size"""
+    counts = cache_store.counters(STATS_PREFIX)
+    hits = counts.get(STATS_PREFIX + 'hit', 0)
+    misses = counts.get(STATS_PREFIX + 'miss', 0)
+    local = counts.get(STATS_PREFIX + 'local', 0)
+    uncacheable = counts.get(STATS_PREFIX + 'uncacheable', 0)
+    total = hits + misses + local + uncacheable
+    return {
+        'local': local,
+        'hits': hits,
+        'misses': misses,
+        'uncacheable': uncacheable,
+        'hit_rate': round((hits + local) / total, 3) if total else 0,
+        'entries': FoodTextCache.query.count()
+    }
@@ -23,7 +23,6 @@ class Meal(db.Model):
     food_score = db.Column(db.Integer, default=5)
     health_benefits = db.Column(db.Text, default='[]')
     health_negatives = db.Column(db.Text, default='[]')
-    image_data = db.Column(db.LargeBinary, nullable=True)
     logged_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
     # Portion tracking fields
@@ -37,6 +36,55 @@ class Meal(db.Model):
     # Entry method tracking
     entry_method = db.Column(db.String(20), default='photo')  # 'photo' or 'text'
 
+    # Thumbnail bytes live in MealImage so meal lists never read them. Older
+    # databases still have a meal.image_data column; migrate_legacy_images()
+    # copies it over and empties it.
+    image = db.relationship('MealImage', uselist=False, lazy='select', cascade='all, delete-orphan')
+
+
+class DailyNutrition(db.Model):
+    """Per-user, per-day meal totals, kept in step with Meal by daily_rollup"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)  # Calendar date of Meal.logged_at - see daily_rollup
+    total_calories = db.Column(db.Float, default=0)
+    total_protein = db.Column(db.Float, default=0)
+    total_carbs = db.Column(db.Float, default=0)
+    total_fat = db.Column(db.Float, default=0)
+    meal_count = db.Column(db.Integer, default=0)
+
+
+class ResourceVersion(db.Model):
+    """Change counter behind the ETags of polled endpoints - see app/versions.py"""
+    resource = db.Column(db.String(50), primary_key=True)
+    user_id = db.Column(db.Integer, primary_key=True)  # 0 for resources shared by everyone
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class MealImage(db.Model):
+    """Thumbnail for a logged meal, one row per meal"""
+    meal_id = db.Column(db.Integer, db.ForeignKey('meal.id'), primary_key=True)
+    mime_type = db.Column(db.String(50), default='image/jpeg')
+    data = db.deferred(db.Column(db.LargeBinary, nullable=False))  # Only loaded when the image is served
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    variants = db.relationship('MealImageVariant', lazy='select', cascade='all, delete-orphan')
+
+
+class MealImageVariant(db.Model):
+    """A smaller rendition of a MealImage (e.g. the dashboard list icon), generated once"""
+    meal_id = db.Column(db.Integer, db.ForeignKey('meal_image.meal_id'), primary_key=True)
+    variant = db.Column(db.String(20), primary_key=True)  # Key of image_store.VARIANTS
+    mime_type = db.Column(db.String(50), default='image/jpeg')
+    data = db.deferred(db.Column(db.LargeBinary, nullable=False))
+
+
+class StagedImage(db.Model):
+    """Thumbnail from /analyze waiting for the user to log the meal"""
+    token = db.Column(db.String(32), primary_key=True)  # Random hex, returned to the client
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    mime_type = db.Column(db.String(50), default='image/jpeg')
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
 
 class TodoTask(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -68,3 +116,86 @@ class DevLog(db.Model):
 
     # Relationships
     created_by = db.relationship('User', backref='dev_logs')
+
+
+class NewsArticle(db.Model):
+    """AI news article ingested from an RSS feed"""
+    id = db.Column(db.Integer, primary_key=True)
+    guid = db.Column(db.String(500), unique=True, nullable=False)  # Feed entry id, falls back to link
+    title = db.Column(db.String(500), nullable=False)
+    link = db.Column(db.String(1000), nullable=False, index=True)
+    description = db.Column(db.Text, nullable=True)
+    source = db.Column(db.String(100), nullable=False)
+    image_url = db.Column(db.String(1000), nullable=True)
+    image_key = db.Column(db.String(64), nullable=True, index=True)  # Key for the /news/img thumbnail proxy
+    published_at = db.Column(db.DateTime, nullable=False)
+    fetched_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Cursor pagination walks (published_at, id) newest-first
+    __table_args__ = (
+        db.Index('ix_news_article_published_id', 'published_at', 'id'),
+    )
+
+
+class FoodAnalysisCache(db.Model):
+    """Cached Gemini analysis of a food photo, keyed by image content"""
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False)  # SHA-256 of the uploaded bytes
+    phash = db.Column(db.String(16), nullable=True)  # 64-bit difference hash, hex
+    # 16-bit slices of phash - a near-duplicate within 3 bits must match at least one exactly
+    phash_band0 = db.Column(db.String(4), nullable=True, index=True)
+    phash_band1 = db.Column(db.String(4), nullable=True, index=True)
+    phash_band2 = db.Column(db.String(4), nullable=True, index=True)
+    phash_band3 = db.Column(db.String(4), nullable=True, index=True)
+    result = db.Column(db.Text, nullable=False)  # JSON analysis as returned by Gemini
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    last_hit_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+
+class FoodTextCache(db.Model):
+    """Per-unit nutrition for a normalized text food, learned from Gemini"""
+    id = db.Column(db.Integer, primary_key=True)
+    base_food = db.Column(db.String(200), nullable=False)  # e.g. 'chicken breast'
+    unit = db.Column(db.String(20), nullable=False)  # 'g', 'ml', 'cup', 'unit', ...
+    food_name = db.Column(db.String(200), nullable=False)  # Gemini's interpreted name
+    calories = db.Column(db.Float, nullable=False)  # All macros are per 1 unit
+    protein = db.Column(db.Float, default=0)
+    carbs = db.Column(db.Float, default=0)
+    fat = db.Column(db.Float, default=0)
+    food_score = db.Column(db.Integer, default=5)
+    health_benefits = db.Column(db.Text, default='[]')
+    health_negatives = db.Column(db.Text, default='[]')
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.UniqueConstraint('base_food', 'unit', name='uq_food_text_cache_food_unit'),
+    )
+
+
+class AnalysisJob(db.Model):
+    """Background meal analysis request, polled by the client until done"""
+    id = db.Column(db.String(32), primary_key=True)  # Random hex token
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'image' or 'text'
+    status = db.Column(db.String(20), default='queued', index=True)  # queued, running, done, error
+    result = db.Column(db.Text, nullable=True)  # JSON analysis once done
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+
+class SuggestionCache(db.Model):
+    """Memoized Gemini meal suggestions for one user's current day"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    cache_key = db.Column(db.String(64), nullable=False)  # SHA-256 of calorie bucket + recent meals
+    calorie_bucket = db.Column(db.Integer, nullable=False)
+    result = db.Column(db.Text, nullable=False)  # JSON suggestions as returned by Gemini
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'cache_key', name='uq_suggestion_cache_user_key'),
+    )
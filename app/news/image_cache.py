@@ -0,0 +1,109 @@
+"""
+Thumbnail proxy for news article images.
+
+Publisher images are fetched once, downsized with Pillow and kept on disk
+under a path derived from the hash of the source URL. The cache is bounded
+by total size; least recently served files are evicted first (file mtime is
+bumped on every hit).
+"""
+import hashlib
+import io
+import os
+import tempfile
+
+import requests
+from PIL import Image, ImageOps
+from config import Config
+
+# Refuse to download anything bigger than this from a publisher
+MAX_SOURCE_BYTES = 15 * 1024 * 1024
+
+
+def image_key(url):
+    """Stable key for an image URL, used in /news/img/<key>"""
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()[:40]
+
+
+def _path_for(key):
+    return os.path.join(Config.NEWS_IMAGE_CACHE_DIR, key[:2], key[2:4], f'{key}.jpg')
+
+
+def get_cached_path(key):
+    """Return the cached thumbnail path for key (bumping its LRU stamp), or None"""
+    path = _path_for(key)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def _download(url):
+    from app.news.news_service import FEED_USER_AGENT
+
+    with requests.get(
+        url,
+        stream=True,
+        timeout=(Config.NEWS_FEED_CONNECT_TIMEOUT, Config.NEWS_FEED_READ_TIMEOUT),
+        headers={'User-Agent': FEED_USER_AGENT}
+    ) as response:
+        response.raise_for_status()
+        buf = io.BytesIO()
+        for chunk in response.iter_content(64 * 1024):
+            buf.write(chunk)
+            if buf.tell() > MAX_SOURCE_BYTES:
+                raise ValueError('Image too large')
+    return buf.getvalue()
+
+
+def fetch_thumbnail(key, url):
+    """Download url, downsize it and store it under key. Returns the file path."""
+    img = Image.open(io.BytesIO(_download(url)))
+    max_width = Config.NEWS_IMAGE_MAX_WIDTH
+    # Let the JPEG decoder skip most of the work for big photos
+    img.draft('RGB', (max_width, max_width))
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail((max_width, max_width * 2))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    path = _path_for(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        img.save(f, format='JPEG', quality=75, optimize=True, progressive=True)
+    os.replace(tmp_path, path)
+
+    evict_if_needed()
+    return path
+
+
+def evict_if_needed():
+    """Delete least recently served thumbnails until the cache fits its budget"""
+    files = []
+    total = 0
+    for root, _, names in os.walk(Config.NEWS_IMAGE_CACHE_DIR):
+        for name in names:
+            if not name.endswith('.jpg'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    if total <= Config.NEWS_IMAGE_CACHE_MAX_BYTES:
+        return
+
+    # Trim to 90% so we aren't evicting on every new image
+    target = Config.NEWS_IMAGE_CACHE_MAX_BYTES * 0.9
+    for _, size, path in sorted(files):
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            pass
@@ -1,7 +1,24 @@
-import feedparser
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+
+import feedparser
 import requests
-from urllib.parse import urlparse
+from sqlalchemy import and_, or_
+from app import cache_store
+from app.extensions import db
+from app.models import NewsArticle
+from app.news.image_cache import image_key
+from config import Config
+
+FEED_USER_AGENT = 'RoarAssist/1.0 (+https://github.com/roarbis/roar-assist)'
+
+# Shared store key / lease name tracking the last feed ingestion
+NEWS_INGEST_KEY = 'ai_news_ingested_at'
+# How often a request waiting on another worker's first ingestion checks for it
+INGEST_POLL_INTERVAL = 0.5
 
 # AI News RSS Feeds - using free, reliable sources
 AI_NEWS_FEEDS = [
@@ -32,69 +49,307 @@ AI_NEWS_FEEDS = [
     }
 ]
 
+def entry_to_article(entry, feed_config):
+    """Convert a feedparser entry into the article dict used by the news page"""
+    # Parse publish date
+    pub_date = None
+    if hasattr(entry, 'published_parsed') and entry.published_parsed:
+        pub_date = datetime(*entry.published_parsed[:6])
+    elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
+        pub_date = datetime(*entry.updated_parsed[:6])
+
+    # Get description/summary
+    description = ''
+    if hasattr(entry, 'summary'):
+        description = entry.summary
+    elif hasattr(entry, 'description'):
+        description = entry.description
+
+    # Clean HTML tags from description
+    description = re.sub('<[^<]+?>', '', description)
+    description = description.strip()[:300]  # Limit to 300 chars
+
+    # Get image if available
+    image_url = None
+    if hasattr(entry, 'media_content') and entry.media_content:
+        image_url = entry.media_content[0].get('url')
+    elif hasattr(entry, 'media_thumbnail') and entry.media_thumbnail:
+        image_url = entry.media_thumbnail[0].get('url')
+    elif hasattr(entry, 'enclosures') and entry.enclosures:
+        for enclosure in entry.enclosures:
+            if 'image' in enclosure.get('type', ''):
+                image_url = enclosure.get('href')
+                break
+
+    link = entry.link if hasattr(entry, 'link') else '#'
+    return {
+        'guid': entry.get('id') or link,
+        'title': entry.title if hasattr(entry, 'title') else 'No Title',
+        'link': link,
+        'description': description,
+        'source': feed_config['source'],
+        'published': pub_date.isoformat() if pub_date else datetime.now().isoformat(),
+        'published_readable': pub_date.strftime('%B %d, %Y at %I:%M %p') if pub_date else 'Recently',
+        'image': image_url
+    }
+
+
+def _validators_key(feed_config):
+    return f"feed_validators:{feed_config['url']}"
+
+
 def parse_feed(feed_config):
-    """Parse a single RSS feed and return formatted articles"""
-    articles = []
+    """Download and parse a single RSS feed and return (articles, not_modified).
+
+    Uses conditional GET: the feed's last ETag / Last-Modified and parsed
+    articles are kept in the shared store, so a 304 reply reuses them
+    without downloading or parsing the XML again. Raises on network errors
+    so callers can report per-feed status.
+    """
+    stored = cache_store.get(_validators_key(feed_config))
+    validators = stored[0] if stored else {}
+
+    headers = {'User-Agent': FEED_USER_AGENT}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('modified'):
+        headers['If-Modified-Since'] = validators['modified']
+
+    response = requests.get(
+        feed_config['url'],
+        timeout=(Config.NEWS_FEED_CONNECT_TIMEOUT, Config.NEWS_FEED_READ_TIMEOUT),
+        headers=headers
+    )
+    if response.status_code == 304 and 'articles' in validators:
+        return validators['articles'], True
+    response.raise_for_status()
+
+    feed = feedparser.parse(response.content)
+    # Keep every entry - ingestion dedupes, and readers page through history
+    articles = [entry_to_article(entry, feed_config) for entry in feed.entries]
+
+    etag = response.headers.get('ETag')
+    modified = response.headers.get('Last-Modified')
+    if etag or modified:
+        cache_store.put(_validators_key(feed_config), {
+            'etag': etag,
+            'modified': modified,
+            'articles': articles
+        })
+    return articles, False
+
+
+def _fetch_feed(feed_config):
+    """Worker: fetch one feed, returning (articles, status)"""
+    started = time.monotonic()
     try:
-        feed = feedparser.parse(feed_config['url'])
-
-        for entry in feed.entries[:5]:  # Get top 5 articles from each feed
-            # Parse publish date
-            pub_date = None
-            if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                pub_date = datetime(*entry.published_parsed[:6])
-            elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                pub_date = datetime(*entry.updated_parsed[:6])
-
-            # Get description/summary
-            description = ''
-            if hasattr(entry, 'summary'):
-                description = entry.summary
-            elif hasattr(entry, 'description'):
-                description = entry.description
-
-            # Clean HTML tags from description
-            import re
-            description = re.sub('<[^<]+?>', '', description)
-            description = description.strip()[:300]  # Limit to 300 chars
-
-            # Get image if available
-            image_url = None
-            if hasattr(entry, 'media_content') and entry.media_content:
-                image_url = entry.media_content[0].get('url')
-            elif hasattr(entry, 'media_thumbnail') and entry.media_thumbnail:
-                image_url = entry.media_thumbnail[0].get('url')
-            elif hasattr(entry, 'enclosures') and entry.enclosures:
-                for enclosure in entry.enclosures:
-                    if 'image' in enclosure.get('type', ''):
-                        image_url = enclosure.get('href')
-                        break
-
-            article = {
-                'title': entry.title if hasattr(entry, 'title') else 'No Title',
-                'link': entry.link if hasattr(entry, 'link') else '#',
-                'description': description,
-                'source': feed_config['source'],
-                'published': pub_date.isoformat() if pub_date else datetime.now().isoformat(),
-                'published_readable': pub_date.strftime('%B %d, %Y at %I:%M %p') if pub_date else 'Recently',
-                'image': image_url
-            }
-            articles.append(article)
+        articles, not_modified = parse_feed(feed_config)
+        status = {'status': 'ok', 'count': len(articles), 'not_modified': not_modified}
+    except requests.Timeout:
+        articles = []
+        status = {'status': 'timeout', 'count': 0}
     except Exception as e:
         print(f"Error parsing feed {feed_config['name']}: {str(e)}")
+        articles = []
+        status = {'status': 'error', 'count': 0, 'error': str(e)}
 
-    return articles
+    status['name'] = feed_config['name']
+    status['elapsed_ms'] = round((time.monotonic() - started) * 1000)
+    return articles, status
 
-def get_ai_news():
-    """Fetch AI news from multiple RSS feeds"""
-    all_articles = []
 
-    for feed_config in AI_NEWS_FEEDS:
-        articles = parse_feed(feed_config)
-        all_articles.extend(articles)
+def fetch_ai_news(deadline=None):
+    """Fetch all AI news feeds in parallel.
+
+    Returns whatever arrived before the overall deadline, along with a
+    status entry per feed ('ok', 'timeout' or 'error').
+    """
+    deadline = Config.NEWS_FETCH_DEADLINE if deadline is None else deadline
+    started = time.monotonic()
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(Config.NEWS_FETCH_WORKERS, len(AI_NEWS_FEEDS)) or 1,
+        thread_name_prefix='news-fetch'
+    )
+    futures = {executor.submit(_fetch_feed, feed): feed for feed in AI_NEWS_FEEDS}
+    done, _ = wait(futures, timeout=deadline)
+    # Don't block on stragglers - their own read timeout will reap them
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    all_articles = []
+    feeds = []
+    for future, feed_config in futures.items():
+        if future in done:
+            articles, status = future.result()
+            all_articles.extend(articles)
+        else:
+            status = {
+                'name': feed_config['name'],
+                'status': 'timeout',
+                'count': 0,
+                'elapsed_ms': round((time.monotonic() - started) * 1000)
+            }
+        feeds.append(status)
 
     # Sort by published date (newest first)
     all_articles.sort(key=lambda x: x['published'], reverse=True)
 
-    # Return top 30 articles
-    return all_articles[:30]
+    # 'news' keeps the top 30 for live callers; ingestion wants everything
+    return {'news': all_articles[:30], 'news_all': all_articles, 'feeds': feeds}
+
+
+def get_ai_news():
+    """Fetch AI news from multiple RSS feeds"""
+    return fetch_ai_news()['news']
+
+
+def ingest_news():
+    """Fetch all feeds and insert articles we haven't stored yet.
+
+    Articles are deduplicated on GUID (falling back to link) and on link,
+    so re-polling a feed only writes genuinely new entries. Must run inside
+    an app context. Returns (inserted_count, feed_statuses).
+    """
+    result = fetch_ai_news()
+    articles = result['news_all']
+
+    # Compare on the truncated values that are actually stored, so an
+    # over-long GUID matches its own row instead of hitting the unique index
+    def guid_of(article):
+        return (article.get('guid') or article['link'])[:500]
+
+    guids = {guid_of(a) for a in articles}
+    links = {a['link'][:1000] for a in articles}
+    existing = db.session.query(NewsArticle.guid, NewsArticle.link).filter(
+        or_(NewsArticle.guid.in_(guids), NewsArticle.link.in_(links))
+    ).all()
+    seen = {guid for guid, _ in existing} | {link for _, link in existing}
+
+    inserted = 0
+    for article in articles:
+        guid = guid_of(article)
+        link = article['link'][:1000]
+        if guid in seen or link in seen:
+            continue
+        seen.update((guid, link))
+        image_url = (article['image'] or '')[:1000] or None
+        db.session.add(NewsArticle(
+            guid=guid,
+            title=article['title'][:500],
+            link=link,
+            description=article['description'],
+            source=article['source'],
+            image_url=image_url,
+            image_key=image_key(image_url) if image_url else None,
+            published_at=datetime.fromisoformat(article['published'])
+        ))
+        inserted += 1
+
+    db.session.commit()
+    if any(feed['status'] == 'ok' for feed in result['feeds']):
+        cache_store.put(NEWS_INGEST_KEY, {'feeds': result['feeds'], 'inserted': inserted})
+    return inserted, result['feeds']
+
+
+def _ingest_in_background(app):
+    """Run ingest_news on a daemon thread (lease already held)"""
+    def run():
+        with app.app_context():
+            try:
+                ingest_news()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error ingesting AI news: {str(e)}")
+            finally:
+                cache_store.release_lease(NEWS_INGEST_KEY)
+
+    threading.Thread(target=run, name='news-ingest', daemon=True).start()
+
+
+def ensure_news_fresh(app):
+    """Kick off feed ingestion if the stored articles are older than the TTL.
+
+    Shared across gunicorn workers via the cache store: whichever worker
+    wins the lease ingests in the background while readers keep serving
+    what's already in the database. Only a never-ingested database makes
+    the caller wait - for its own fetch, or for the worker that holds the
+    lease to publish (bounded by the lease TTL). Returns a small status
+    dict for the API response.
+    """
+    last = cache_store.get(NEWS_INGEST_KEY)
+    lease_ttl = Config.NEWS_FETCH_DEADLINE + Config.NEWS_FEED_READ_TIMEOUT + 30
+
+    if last:
+        info, ingested_at = last
+        age = round(time.time() - ingested_at, 1)
+        if age < Config.NEWS_CACHE_TTL:
+            return {'status': 'hit', 'age_seconds': age, 'feeds': info['feeds']}
+        if cache_store.acquire_lease(NEWS_INGEST_KEY, lease_ttl):
+            _ingest_in_background(app)
+        return {'status': 'stale', 'age_seconds': age, 'feeds': info['feeds']}
+
+    deadline = time.monotonic() + lease_ttl
+    while True:
+        if cache_store.acquire_lease(NEWS_INGEST_KEY, lease_ttl):
+            try:
+                _, feeds = ingest_news()
+            finally:
+                cache_store.release_lease(NEWS_INGEST_KEY)
+            return {'status': 'miss', 'age_seconds': 0, 'feeds': feeds}
+
+        # Another worker is filling the empty database - wait for it. If it
+        # gives up without a result the lease frees up and we try ourselves.
+        time.sleep(INGEST_POLL_INTERVAL)
+        last = cache_store.get(NEWS_INGEST_KEY)
+        if last:
+            info, ingested_at = last
+            return {'status': 'miss', 'age_seconds': round(time.time() - ingested_at, 1), 'feeds': info['feeds']}
+        if time.monotonic() > deadline:
+            return {'status': 'miss', 'age_seconds': 0, 'feeds': []}
+
+
+def article_to_dict(article):
+    """Serialize a stored NewsArticle in the shape the news page expects"""
+    return {
+        'id': article.id,
+        'title': article.title,
+        'link': article.link,
+        'description': article.description or '',
+        'source': article.source,
+        'published': article.published_at.isoformat(),
+        'published_readable': article.published_at.strftime('%B %d, %Y at %I:%M %p'),
+        # Served through the thumbnail proxy rather than the publisher's full-size image
+        'image': f'/news/img/{article.image_key}' if article.image_key else None
+    }
+
+
+def encode_cursor(article):
+    return f'{article.published_at.isoformat()},{article.id}'
+
+
+def decode_cursor(cursor):
+    """Parse a '<published ISO>,<id>' cursor, raising ValueError if malformed"""
+    published, _, article_id = cursor.rpartition(',')
+    return datetime.fromisoformat(published), int(article_id)
+
+
+def get_news_page(before=None, limit=30):
+    """Return (articles, next_cursor) for one page, newest first.
+
+    Keyset pagination on (published_at, id) so every page is an index range
+    scan regardless of how deep the reader scrolls.
+    """
+    query = NewsArticle.query
+    if before:
+        published, article_id = before
+        query = query.filter(or_(
+            NewsArticle.published_at < published,
+            and_(NewsArticle.published_at == published, NewsArticle.id < article_id)
+        ))
+
+    rows = query.order_by(
+        NewsArticle.published_at.desc(), NewsArticle.id.desc()
+    ).limit(limit + 1).all()
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
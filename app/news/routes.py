@@ -1,6 +1,8 @@
-from flask import render_template, jsonify
+from flask import render_template, jsonify, request, current_app, send_file
 from app.news import news_bp
-from app.news.news_service import get_ai_news
+from app.news.image_cache import get_cached_path, fetch_thumbnail
+from app.models import NewsArticle
+from app.news.news_service import ensure_news_fresh, get_news_page, article_to_dict, decode_cursor
 
 @news_bp.route('/')
 def index():
@@ -9,15 +11,58 @@ def index():
 
 @news_bp.route('/api/fetch')
 def fetch_news():
-    """API endpoint to fetch latest AI news"""
+    """API endpoint to page through stored AI news, newest first
+
+    Query params: before=<published ISO>,<id> cursor from a previous page's
+    next_cursor, and limit (1-100, default 30).
+    """
+    limit = max(1, min(request.args.get('limit', 30, type=int), 100))
+    before = request.args.get('before')
     try:
-        news_items = get_ai_news()
+        before = decode_cursor(before) if before else None
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid cursor'
+        }), 400
+
+    try:
+        # Only the first page triggers a freshness check / ingestion
+        cache = ensure_news_fresh(current_app._get_current_object()) if before is None else None
+        articles, next_cursor = get_news_page(before, limit)
         return jsonify({
             'success': True,
-            'news': news_items
+            'news': [article_to_dict(a) for a in articles],
+            'next_cursor': next_cursor,
+            'cache': cache
         })
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
+
+@news_bp.route('/img/<key>')
+def image(key):
+    """Serve a downsized, disk-cached copy of an article image"""
+    path = get_cached_path(key)
+    if not path:
+        article = NewsArticle.query.filter_by(image_key=key).first()
+        if not article:
+            return jsonify({
+                'success': False,
+                'error': 'Image not found'
+            }), 404
+        try:
+            path = fetch_thumbnail(key, article.image_url)
+        except Exception as e:
+            print(f"Error fetching news image {article.image_url}: {str(e)}")
+            return jsonify({
+                'success': False,
+                'error': 'Image unavailable'
+            }), 502
+
+    # Keys are derived from the source URL, so a key's bytes never change
+    response = send_file(path, mimetype='image/jpeg', max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
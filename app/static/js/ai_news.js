@@ -3,6 +3,7 @@ let allNews = [];
 let filteredNews = [];
 let bookmarkedArticles = [];
 let readArticles = [];
+let nextCursor = null;
 
 // DOM Elements
 const newsGrid = document.getElementById('newsGrid');
@@ -17,6 +18,7 @@ const bookmarkModal = document.getElementById('bookmarkModal');
 const closeBookmarksBtn = document.getElementById('closeBookmarks');
 const bookmarksList = document.getElementById('bookmarksList');
 const bookmarkCount = document.getElementById('bookmarkCount');
+const loadMoreBtn = document.getElementById('loadMoreBtn');
 
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
@@ -34,6 +36,8 @@ function setupEventListeners() {
 
     retryBtn.addEventListener('click', fetchNews);
 
+    loadMoreBtn.addEventListener('click', loadMoreNews);
+
     filterDate.addEventListener('change', () => {
         filterNewsByDate();
     });
@@ -63,6 +67,7 @@ async function fetchNews() {
 
         if (data.success) {
             allNews = data.news;
+            nextCursor = data.next_cursor;
             filteredNews = [...allNews];
             renderNews();
             hideLoading();
@@ -77,7 +82,29 @@ async function fetchNews() {
     }
 }
 
+async function loadMoreNews() {
+    if (!nextCursor) return;
+
+    loadMoreBtn.disabled = true;
+    try {
+        const response = await fetch(`/news/api/fetch?before=${encodeURIComponent(nextCursor)}`);
+        const data = await response.json();
+
+        if (data.success) {
+            allNews = allNews.concat(data.news);
+            nextCursor = data.next_cursor;
+            filterNewsByDate();
+        }
+    } catch (error) {
+        console.error('Error loading more news:', error);
+    } finally {
+        loadMoreBtn.disabled = false;
+    }
+}
+
 function renderNews() {
+    loadMoreBtn.style.display = nextCursor ? 'inline-block' : 'none';
+
     if (filteredNews.length === 0) {
         newsGrid.innerHTML = '';
         emptyState.style.display = 'block';
@@ -105,7 +132,7 @@ function createNewsCard(article, index) {
     }
 
     const imageHtml = article.image
-        ? `<img src="${article.image}" alt="${escapeHtml(article.title)}" class="news-image" onerror="this.parentElement.innerHTML='<div class=\\'news-image-placeholder\\'>📰</div>'">`
+        ? `<img src="${article.image}" loading="lazy" alt="${escapeHtml(article.title)}" class="news-image" onerror="this.parentElement.innerHTML='<div class=\\'news-image-placeholder\\'>📰</div>'">`
         : `<div class="news-image-placeholder">📰</div>`;
 
     card.innerHTML = `
@@ -13,7 +13,8 @@ const API = {
     },
 
     async post(url, body) {
-        const res = await fetch(url, {
+        const sep = url.includes('?') ? '&' : '?';
+        const res = await fetch(`${url}${sep}tz_offset=${this.tzOffset}`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(body)
@@ -50,6 +51,31 @@ const API = {
         return res.json();
     },
 
+    // Start a background analysis job (POST ...?mode=async) and poll until it finishes.
+    // Resolves to the job's result, or an {error, message} object like the sync endpoints.
+    async runJob(url, payload, isForm = false) {
+        const jobUrl = `${url}${url.includes('?') ? '&' : '?'}mode=async`;
+        const job = isForm ? await this.postForm(jobUrl, payload) : await this.post(jobUrl, payload);
+        if (!job || job.error) return job;
+
+        // Wait as long as the server may keep the job queued and running
+        const timeoutMs = (job.timeout_seconds || 120) * 1000;
+        const started = Date.now();
+        let delay = 500;
+        while (Date.now() - started < timeoutMs) {
+            await new Promise(resolve => setTimeout(resolve, delay));
+            delay = Math.min(delay * 1.5, 2000);
+
+            const status = await this.get(job.status_url);
+            if (!status) return null;
+            if (status.status === 'done') return status.result;
+            if (status.status === 'error' || status.error) {
+                return { error: true, message: status.error || status.message };
+            }
+        }
+        return { error: true, message: 'Analysis is taking too long. Please try again.' };
+    },
+
     async delete(url) {
         const res = await fetch(url, { method: 'DELETE' });
         if (res.status === 401) {
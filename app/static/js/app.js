@@ -4,8 +4,9 @@
 initTheme();
 
 document.addEventListener('DOMContentLoaded', async () => {
-    // Check auth status
-    const status = await API.get('/auth/status');
+    // Auth status and all dashboard data in one round trip
+    const boot = await API.get('/api/dashboard/bootstrap');
+    const status = boot && boot.auth;
     if (!status || !status.logged_in) {
         window.location.href = '/auth/login';
         return;
@@ -22,11 +23,13 @@ document.addEventListener('DOMContentLoaded', async () => {
     initSearch();
     initHistory();
     initExport();
+    initTrends();
     initSettings();
     initThemeToggle();
 
-    // Load dashboard data
-    loadDashboard();
+    // Render dashboard data
+    prefetchedWeekly = boot.weekly;
+    renderDashboard(boot.today);
 });
 
 // ===== Tab Navigation =====
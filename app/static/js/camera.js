@@ -3,6 +3,10 @@
 let currentAnalysis = null;
 let portionMultiplier = 1.0;
 
+// Photos are downscaled in the browser before upload; the server would
+// shrink them to the same long edge anyway (GEMINI_IMAGE_MAX_EDGE)
+const UPLOAD_QUALITY = 0.85;
+
 function initCamera() {
     const photoInput = document.getElementById('photoInput');
     const takePhotoBtn = document.getElementById('takePhotoBtn');
@@ -41,12 +45,22 @@ async function handlePhotoSelected(e) {
     };
     reader.readAsDataURL(file);
 
+    // Shrink before sending - phone photos are several MB over cellular
+    const maxEdge = parseInt(e.target.dataset.maxEdge, 10) || 1024;
+    const upload = await downscaleImage(file, maxEdge);
+    const savingsEl = document.getElementById('uploadSavings');
+    if (savingsEl) {
+        savingsEl.textContent = upload !== file
+            ? `Uploading ${formatBytes(upload.size)} instead of ${formatBytes(file.size)}`
+            : '';
+    }
+
     // Send to API
     const formData = new FormData();
-    formData.append('image', file);
+    formData.append('image', upload, upload === file ? file.name : `photo.${upload.type === 'image/webp' ? 'webp' : 'jpg'}`);
 
     try {
-        const data = await API.postForm('/api/meals/analyze', formData);
+        const data = await API.runJob('/api/meals/analyze', formData, true);
 
         if (!data || data.error) {
             alert(data?.message || 'Analysis failed. Please try again.');
@@ -62,6 +76,60 @@ async function handlePhotoSelected(e) {
     }
 }
 
+// Resize a photo so its long edge is at most maxEdge and re-encode it as WebP
+// (JPEG where the browser can't encode WebP). EXIF orientation is applied while
+// decoding. Resolves to the original file if that isn't smaller or the browser
+// lacks createImageBitmap.
+async function downscaleImage(file, maxEdge) {
+    if (!window.createImageBitmap) return file;
+
+    let bitmap;
+    try {
+        bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' });
+    } catch (err) {
+        return file;
+    }
+
+    const scale = Math.min(1, maxEdge / Math.max(bitmap.width, bitmap.height));
+    const width = Math.round(bitmap.width * scale);
+    const height = Math.round(bitmap.height * scale);
+
+    let blob = null;
+    try {
+        if (window.OffscreenCanvas) {
+            const canvas = new OffscreenCanvas(width, height);
+            canvas.getContext('2d').drawImage(bitmap, 0, 0, width, height);
+            blob = await canvas.convertToBlob({ type: 'image/webp', quality: UPLOAD_QUALITY });
+            // Unsupported types silently come back as PNG
+            if (blob.type !== 'image/webp') {
+                blob = await canvas.convertToBlob({ type: 'image/jpeg', quality: UPLOAD_QUALITY });
+            }
+        } else {
+            const canvas = document.createElement('canvas');
+            canvas.width = width;
+            canvas.height = height;
+            canvas.getContext('2d').drawImage(bitmap, 0, 0, width, height);
+            const toBlob = (type) => new Promise(resolve => canvas.toBlob(resolve, type, UPLOAD_QUALITY));
+            blob = await toBlob('image/webp');
+            if (!blob || blob.type !== 'image/webp') blob = await toBlob('image/jpeg');
+        }
+    } catch (err) {
+        blob = null;
+    } finally {
+        bitmap.close();
+    }
+
+    if (!blob || blob.size >= file.size) return file;
+    console.info(`Photo upload: ${formatBytes(file.size)} -> ${formatBytes(blob.size)} ` +
+                 `(${formatBytes(file.size - blob.size)} saved, ${width}x${height} ${blob.type})`);
+    return blob;
+}
+
+function formatBytes(bytes) {
+    if (bytes >= 1024 * 1024) return `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
+    return `${Math.round(bytes / 1024)} KB`;
+}
+
 function displayAnalysisResult(data) {
     document.getElementById('analysisLoading').style.display = 'none';
     document.getElementById('analysisResult').style.display = 'block';
@@ -208,7 +276,7 @@ async function handleLogMeal() {
             food_score: currentAnalysis.food_score,
             health_benefits: currentAnalysis.health_benefits,
             health_negatives: currentAnalysis.health_negatives,
-            thumbnail: currentAnalysis.thumbnail,
+            thumbnail_token: currentAnalysis.thumbnail_token,
             portion_multiplier: portionMultiplier,
             original_portion: currentAnalysis.portion_estimate,
             original_calories: currentAnalysis.calories,
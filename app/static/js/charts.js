@@ -1,6 +1,7 @@
 // Chart.js wrapper functions
 let macroChartInstance = null;
 let weeklyChartInstance = null;
+let trendChartInstance = null;
 
 function renderMacroChart(protein, carbs, fat) {
     const ctx = document.getElementById('macroChart');
@@ -104,3 +105,82 @@ function renderWeeklyChart(days, target) {
         }
     });
 }
+
+function renderTrendChart(points, target) {
+    const ctx = document.getElementById('trendChart');
+    if (!ctx) return;
+
+    const labels = points.map(p => new Date(p.date + 'T00:00:00').toLocaleDateString([], { month: 'short', day: 'numeric' }));
+    const calories = points.map(p => p.total_calories);
+    const rolling = points.map(p => p.rolling_average);
+    const targetLine = Array(points.length).fill(target);
+
+    if (trendChartInstance) {
+        trendChartInstance.data.labels = labels;
+        trendChartInstance.data.datasets[0].data = calories;
+        trendChartInstance.data.datasets[1].data = rolling;
+        trendChartInstance.data.datasets[2].data = targetLine;
+        trendChartInstance.update();
+        return;
+    }
+
+    trendChartInstance = new Chart(ctx, {
+        type: 'line',
+        data: {
+            labels,
+            datasets: [
+                {
+                    label: 'Calories',
+                    data: calories,
+                    borderColor: 'rgba(76, 175, 80, 0.35)',
+                    borderWidth: 1,
+                    pointRadius: 0,
+                    fill: false
+                },
+                {
+                    label: '7-day average',
+                    data: rolling,
+                    borderColor: '#4CAF50',
+                    borderWidth: 2,
+                    pointRadius: 0,
+                    tension: 0.3,
+                    fill: false
+                },
+                {
+                    label: 'Target',
+                    data: targetLine,
+                    borderColor: '#FF9800',
+                    borderDash: [6, 4],
+                    borderWidth: 2,
+                    pointRadius: 0,
+                    fill: false
+                }
+            ]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            animation: false,
+            interaction: { mode: 'index', intersect: false },
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    grid: { color: '#f0f0f0' },
+                    ticks: { font: { size: 11 } }
+                },
+                x: {
+                    grid: { display: false },
+                    ticks: { font: { size: 11 }, maxTicksLimit: 6, maxRotation: 0 }
+                }
+            },
+            plugins: {
+                legend: { display: false },
+                tooltip: {
+                    callbacks: {
+                        label: (ctx) => `${ctx.dataset.label}: ${Math.round(ctx.parsed.y)} kcal`
+                    }
+                }
+            }
+        }
+    });
+}
@@ -4,6 +4,13 @@ async function loadDashboard() {
     const data = await API.get('/api/meals/today');
     if (!data) return;
 
+    // Meals changed since page load, so the bootstrap's weekly totals are stale
+    prefetchedWeekly = null;
+    renderDashboard(data);
+}
+
+// data is a /api/meals/today response (or the 'today' part of /api/dashboard/bootstrap)
+function renderDashboard(data) {
     updateProgressBar(data.total_calories, data.target);
     updateMacroChart(data.total_protein, data.total_carbs, data.total_fat);
     updateTodayMeals(data.meals);
@@ -73,8 +80,8 @@ function updateTodayMeals(meals) {
 
         return `
         <div class="meal-item" data-meal-id="${meal.id}">
-            ${meal.has_image
-                ? `<img class="meal-thumb" src="/api/meals/image/${meal.id}" onerror="this.style.display='none'">`
+            ${meal.image_url
+                ? `<img class="meal-thumb" src="${meal.image_url}" loading="lazy" onerror="this.style.display='none'">`
                 : `<div class="meal-thumb-placeholder">&#127869;</div>`
             }
             <div class="meal-info">
@@ -98,7 +105,45 @@ async function deleteMeal(mealId) {
     }
 }
 
+let suggestionsStream = null;
+
+function renderSuggestion(s) {
+    return `
+            <div class="suggestion-item">
+                <div class="suggestion-name">${escapeHtml(s.name)}</div>
+                <div class="suggestion-meta">~${s.calories} kcal &middot; ${escapeHtml(s.reason)}</div>
+            </div>`;
+}
+
 async function loadSuggestions(remaining) {
+    const card = document.getElementById('suggestionsCard');
+    const list = document.getElementById('suggestionsList');
+    if (!card || !list) return;
+
+    if (!window.EventSource) {
+        return loadSuggestionsOnce(remaining);
+    }
+
+    // Stream suggestions in as the model produces them
+    if (suggestionsStream) suggestionsStream.close();
+    list.innerHTML = '';
+    const stream = new EventSource(`/api/meals/suggest/stream?remaining_cal=${remaining}&tz_offset=${API.tzOffset}`);
+    suggestionsStream = stream;
+
+    stream.addEventListener('suggestion', (e) => {
+        list.insertAdjacentHTML('beforeend', renderSuggestion(JSON.parse(e.data)));
+        card.style.display = 'block';
+    });
+    const finish = () => {
+        stream.close();
+        if (suggestionsStream === stream) suggestionsStream = null;
+    };
+    stream.addEventListener('done', finish);
+    // Silently fail for suggestions
+    stream.addEventListener('error', finish);
+}
+
+async function loadSuggestionsOnce(remaining) {
     try {
         const data = await API.get(`/api/meals/suggest?remaining_cal=${remaining}`);
         if (!data || !data.suggestions) return;
@@ -107,12 +152,7 @@ async function loadSuggestions(remaining) {
         const list = document.getElementById('suggestionsList');
         if (!card || !list) return;
 
-        list.innerHTML = data.suggestions.map(s => `
-            <div class="suggestion-item">
-                <div class="suggestion-name">${escapeHtml(s.name)}</div>
-                <div class="suggestion-meta">~${s.calories} kcal &middot; ${escapeHtml(s.reason)}</div>
-            </div>
-        `).join('');
+        list.innerHTML = data.suggestions.map(renderSuggestion).join('');
 
         card.style.display = 'block';
     } catch (e) {
@@ -54,7 +54,7 @@ async function handleFoodSearch() {
     document.getElementById('searchResult').style.display = 'none';
 
     try {
-        const data = await API.post('/api/meals/analyze-text', { query });
+        const data = await API.runJob('/api/meals/analyze-text', { query });
 
         if (!data || data.error) {
             alert(data?.message || 'Analysis failed');
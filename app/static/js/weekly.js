@@ -1,11 +1,61 @@
 // Weekly Summary View
 
+// Weekly totals delivered with /api/dashboard/bootstrap, used for the first visit
+let prefetchedWeekly = null;
+
 async function loadWeekly() {
-    const data = await API.get('/api/dashboard/weekly');
+    const data = prefetchedWeekly || await API.get('/api/dashboard/weekly');
+    prefetchedWeekly = null;
     if (!data) return;
 
     renderWeeklyChart(data.days, data.target);
     renderWeeklyStats(data);
+
+    const active = document.querySelector('.trend-range-btn.active');
+    loadTrends(active ? active.dataset.days : 30);
+}
+
+function initTrends() {
+    document.querySelectorAll('.trend-range-btn').forEach(btn => {
+        btn.addEventListener('click', () => {
+            document.querySelectorAll('.trend-range-btn').forEach(b => b.classList.remove('active'));
+            btn.classList.add('active');
+            loadTrends(btn.dataset.days);
+        });
+    });
+}
+
+async function loadTrends(days) {
+    const data = await API.get(`/api/dashboard/trends?days=${days}`);
+    if (!data || data.error) return;
+
+    renderTrendChart(data.points, data.target);
+    renderTrendStats(data.summary);
+}
+
+function renderTrendStats(summary) {
+    const statsEl = document.getElementById('trendStats');
+    if (!statsEl) return;
+
+    const ratio = summary.macro_ratio;
+    statsEl.innerHTML = `
+        <div class="stat-card">
+            <div class="stat-value">${Math.round(summary.average_calories)}</div>
+            <div class="stat-label">Avg Calories (${summary.logged_days} days logged)</div>
+        </div>
+        <div class="stat-card">
+            <div class="stat-value">${Math.round(summary.adherence_pct)}%</div>
+            <div class="stat-label">Days On Target</div>
+        </div>
+        <div class="stat-card">
+            <div class="stat-value">${summary.current_streak}</div>
+            <div class="stat-label">Logging Streak (best ${summary.longest_streak})</div>
+        </div>
+        <div class="stat-card">
+            <div class="stat-value">${Math.round(ratio.protein)}/${Math.round(ratio.carbs)}/${Math.round(ratio.fat)}</div>
+            <div class="stat-label">Protein / Carbs / Fat %</div>
+        </div>
+    `;
 }
 
 function renderWeeklyStats(data) {
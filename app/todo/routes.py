@@ -3,6 +3,7 @@ from flask_login import login_required, current_user
 from app.todo import todo_bp
 from app.models import TodoTask, User
 from app.extensions import db
+from app.versions import conditional, bump, TODO
 from datetime import datetime, timezone
 
 
@@ -15,6 +16,7 @@ def index():
 
 @todo_bp.route('/api/tasks', methods=['GET'])
 @login_required
+@conditional(TODO, shared=True)
 def get_tasks():
     """Get all tasks"""
     try:
@@ -79,6 +81,7 @@ def create_task():
         )
 
         db.session.add(task)
+        bump(TODO)
         db.session.commit()
 
         return jsonify({
@@ -121,6 +124,7 @@ def toggle_task(task_id):
         else:
             task.completed_at = None
 
+        bump(TODO)
         db.session.commit()
 
         return jsonify({
@@ -159,6 +163,7 @@ def delete_task(task_id):
             }), 403
 
         db.session.delete(task)
+        bump(TODO)
         db.session.commit()
 
         return jsonify({
@@ -0,0 +1,79 @@
+"""
+Per-user, per-resource version counters for conditional GETs.
+
+Write endpoints call bump() before committing, so the version changes in
+the same transaction as the data. Read endpoints decorated with
+@conditional derive their ETag from the current version and answer a
+matching If-None-Match with 304 after a single primary-key lookup,
+without running any of the view's queries.
+
+The version is read before the view runs: if a write lands in between,
+the response carries newer data under the older ETag, and the next poll
+simply gets a full response again. Nothing stale is ever served.
+"""
+import hashlib
+from functools import wraps
+
+from flask import request, make_response
+from flask_login import current_user
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models import ResourceVersion
+
+# Resources
+MEALS = 'meals'      # Meals and calorie target of one user: /api/meals/today, /api/dashboard/summary
+TODO = 'todo'        # Shared task list: /todo/api/tasks
+DEVLOG = 'devlog'    # Shared dev log: /api/devboard/logs
+
+SHARED = 0  # user_id for resources every user sees
+
+
+def get_version(resource, user_id=SHARED):
+    version = db.session.query(ResourceVersion.version).filter_by(
+        resource=resource, user_id=user_id).scalar()
+    return version or 0
+
+
+def bump(resource, user_id=SHARED):
+    """Invalidate every cached copy of resource for user_id. Doesn't commit."""
+    updated = ResourceVersion.query.filter_by(resource=resource, user_id=user_id).update(
+        {ResourceVersion.version: ResourceVersion.version + 1},
+        synchronize_session=False
+    )
+    if not updated:
+        try:
+            with db.session.begin_nested():
+                db.session.add(ResourceVersion(resource=resource, user_id=user_id, version=1))
+        except IntegrityError:
+            # Someone else created the row in the meantime
+            return bump(resource, user_id)
+
+
+def conditional(resource, shared=False, vary=None):
+    """Serve the view with an ETag and answer If-None-Match with 304.
+
+    The ETag covers the resource version, the user, the full request path
+    (query string included, e.g. tz_offset or filters) and vary() - for
+    anything else the response depends on, like the current local date.
+    Use under @login_required.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = SHARED if shared else current_user.id
+            parts = [resource, str(user_id), str(get_version(resource, user_id)),
+                     request.full_path, vary() if vary else '']
+            etag = hashlib.sha1('|'.join(parts).encode()).hexdigest()[:20]
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Always revalidate, never share between users
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
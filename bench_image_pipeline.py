@@ -0,0 +1,75 @@
+"""
+Benchmark the meal photo preprocessing pipeline against the old flow.
+
+Old flow: raw upload bytes go to Gemini, and the image is fully decoded a
+second time to build the thumbnail. New flow: one draft-mode decode
+produces the model input and the thumbnail.
+
+Usage: python bench_image_pipeline.py [photo.jpg ...]
+(without arguments a synthetic 12MP JPEG is used)
+"""
+import sys
+import os
+import io
+import time
+
+# Ensure the project root is on the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+from app.meals.image_pipeline import prepare_image
+
+RUNS = 10
+
+
+def synthetic_photo():
+    """A 4032x3024 JPEG roughly the size of a phone camera shot"""
+    img = Image.radial_gradient('L').resize((4032, 3024)).convert('RGB')
+    noise = Image.effect_noise((4032, 3024), 40).convert('RGB')
+    img = Image.blend(img, noise, 0.5)
+    buf = io.BytesIO()
+    img.save(buf, format='JPEG', quality=92)
+    return buf.getvalue()
+
+
+def old_flow(image_bytes):
+    img = Image.open(io.BytesIO(image_bytes))
+    img.thumbnail((300, 300))
+    buf = io.BytesIO()
+    img.convert('RGB').save(buf, format='JPEG', quality=60)
+    return image_bytes, buf.getvalue()
+
+
+def new_flow(image_bytes):
+    prepared = prepare_image(image_bytes, 'image/jpeg')
+    return prepared.model_bytes, prepared.thumbnail_bytes
+
+
+def time_it(fn, image_bytes):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        result = fn(image_bytes)
+    return (time.perf_counter() - start) / RUNS * 1000, result
+
+
+def bench(label, image_bytes):
+    old_ms, (old_upload, _) = time_it(old_flow, image_bytes)
+    new_ms, (new_upload, _) = time_it(new_flow, image_bytes)
+
+    print(f"\n{label}")
+    print("-" * 50)
+    print(f"  Gemini payload: {len(old_upload) / 1024:8.1f} KB -> {len(new_upload) / 1024:8.1f} KB "
+          f"({100 - len(new_upload) * 100 / len(old_upload):.0f}% smaller)")
+    print(f"  Pillow CPU:     {old_ms:8.1f} ms -> {new_ms:8.1f} ms per upload")
+
+
+if __name__ == '__main__':
+    print("Image preprocessing benchmark")
+    print("=" * 50)
+
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            with open(path, 'rb') as f:
+                bench(path, f.read())
+    else:
+        bench('Synthetic 4032x3024 JPEG', synthetic_photo())
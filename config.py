@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Explicitly load .env from the project root (not relying on cwd)
@@ -23,3 +24,84 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload
+
+    # AI News feed fetching - per-feed connect/read timeouts (seconds) plus an
+    # overall deadline for the parallel fan-out across all feeds
+    NEWS_FEED_CONNECT_TIMEOUT = float(os.environ.get('NEWS_FEED_CONNECT_TIMEOUT', 3))
+    NEWS_FEED_READ_TIMEOUT = float(os.environ.get('NEWS_FEED_READ_TIMEOUT', 6))
+    NEWS_FETCH_DEADLINE = float(os.environ.get('NEWS_FETCH_DEADLINE', 8))
+    NEWS_FETCH_WORKERS = int(os.environ.get('NEWS_FETCH_WORKERS', 5))
+
+    # How long fetched AI news is served as fresh before a background refresh
+    NEWS_CACHE_TTL = int(os.environ.get('NEWS_CACHE_TTL', 300))
+
+    # SQLite file shared by all worker processes on this host (caches, leases)
+    SHARED_CACHE_PATH = os.environ.get(
+        'SHARED_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'roar_assist_shared.sqlite3')
+    )
+
+    # Downsized AI news images served from /news/img/<key>
+    NEWS_IMAGE_CACHE_DIR = os.environ.get(
+        'NEWS_IMAGE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'roar_assist_news_images')
+    )
+    NEWS_IMAGE_CACHE_MAX_BYTES = int(os.environ.get('NEWS_IMAGE_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+    NEWS_IMAGE_MAX_WIDTH = int(os.environ.get('NEWS_IMAGE_MAX_WIDTH', 480))
+
+    # Gemini photo analysis cache - entries live for ANALYSIS_CACHE_TTL seconds
+    # and the least recently hit are evicted beyond ANALYSIS_CACHE_MAX_ENTRIES
+    ANALYSIS_CACHE_TTL = int(os.environ.get('ANALYSIS_CACHE_TTL', 30 * 24 * 3600))
+    ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', 5000))
+
+    # Gemini HTTP client - one pooled client per worker process. The timeout
+    # applies to each attempt and sits close to GEMINI_CALL_DEADLINE, which
+    # bounds all of them: healthy calls take 3-10s and slow ones shouldn't be
+    # cut off and paid for twice (hedging at p95 covers slow tails instead).
+    GEMINI_TIMEOUT_SECONDS = float(os.environ.get('GEMINI_TIMEOUT_SECONDS', 20))
+    GEMINI_MAX_CONNECTIONS = int(os.environ.get('GEMINI_MAX_CONNECTIONS', 10))
+    GEMINI_KEEPALIVE_SECONDS = float(os.environ.get('GEMINI_KEEPALIVE_SECONDS', 60))
+
+    # Gemini resilience - overall deadline per call (across retries), retry
+    # attempts and base backoff, optional hedging after the observed p95
+    # latency, and the circuit breaker's failure threshold and cool-down.
+    # The deadline must stay below gunicorn's worker timeout (30s by default,
+    # --timeout in render.yaml), or a slow call gets the worker killed before
+    # DeadlineExceeded can turn it into a clean error. A request coalesced
+    # behind another (single_flight) can wait the deadline + 5s and then make
+    # its own call, so --timeout should exceed twice the deadline + 5s.
+    GEMINI_CALL_DEADLINE = float(os.environ.get('GEMINI_CALL_DEADLINE', 25))
+    GEMINI_MAX_ATTEMPTS = int(os.environ.get('GEMINI_MAX_ATTEMPTS', 3))
+    GEMINI_RETRY_BASE_DELAY = float(os.environ.get('GEMINI_RETRY_BASE_DELAY', 0.5))
+    GEMINI_HEDGE = os.environ.get('GEMINI_HEDGE', '0') == '1'
+    GEMINI_HEDGE_MIN_SAMPLES = int(os.environ.get('GEMINI_HEDGE_MIN_SAMPLES', 20))
+    GEMINI_BREAKER_FAILURES = int(os.environ.get('GEMINI_BREAKER_FAILURES', 5))
+    GEMINI_BREAKER_RESET_SECONDS = float(os.environ.get('GEMINI_BREAKER_RESET_SECONDS', 30))
+
+    # Uploaded meal photos are downscaled to this long edge / JPEG quality before Gemini
+    GEMINI_IMAGE_MAX_EDGE = int(os.environ.get('GEMINI_IMAGE_MAX_EDGE', 1024))
+    GEMINI_IMAGE_QUALITY = int(os.environ.get('GEMINI_IMAGE_QUALITY', 85))
+
+    # Analysis thumbnails are staged server-side until /log claims them; stages
+    # older than this are discarded
+    STAGED_IMAGE_TTL = int(os.environ.get('STAGED_IMAGE_TTL', 2 * 3600))
+
+    # Background analysis jobs (POST /analyze?mode=async) - threads per worker
+    # process, how long a job may run (from start) or wait in the queue (from
+    # submission) before it's failed, and how long finished jobs are kept
+    ANALYSIS_JOB_WORKERS = int(os.environ.get('ANALYSIS_JOB_WORKERS', 4))
+    ANALYSIS_JOB_TIMEOUT = int(os.environ.get('ANALYSIS_JOB_TIMEOUT', 120))
+    ANALYSIS_JOB_QUEUE_TIMEOUT = int(os.environ.get('ANALYSIS_JOB_QUEUE_TIMEOUT', 600))
+    ANALYSIS_JOB_RETENTION = int(os.environ.get('ANALYSIS_JOB_RETENTION', 24 * 3600))
+
+    # Batch analysis - max items per request and per Gemini call
+    BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 10))
+    BATCH_ITEMS_PER_CALL = int(os.environ.get('BATCH_ITEMS_PER_CALL', 10))
+
+    # Max points /dashboard/trends returns per series (longer ranges are downsampled)
+    TRENDS_MAX_POINTS = int(os.environ.get('TRENDS_MAX_POINTS', 120))
+
+    # Meal suggestion cache - remaining calories are rounded down to this
+    # bucket for the cache key; entries are dropped when a meal is logged or
+    # deleted and optionally re-fetched in the background right after a log
+    SUGGESTION_CALORIE_BUCKET = int(os.environ.get('SUGGESTION_CALORIE_BUCKET', 50))
+    SUGGESTION_CACHE_TTL = int(os.environ.get('SUGGESTION_CACHE_TTL', 24 * 3600))
+    SUGGESTION_PREFETCH = os.environ.get('SUGGESTION_PREFETCH', '1') == '1'
@@ -0,0 +1,71 @@
+"""
+Tests for /api/meals/analyze-batch request validation
+
+Malformed JSON bodies must be rejected with 400 before anything is sent
+to Gemini (e.g. a string 'items' used to be split into letters).
+Usage: python test_analyze_batch.py (or pytest test_analyze_batch.py)
+"""
+import sys
+import os
+import io
+
+# Fix encoding for Windows console
+if __name__ == '__main__':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+# Ensure the project root is on the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Use a throwaway in-memory database
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from app import create_app
+from app.extensions import db
+from app.models import User
+
+
+def _client():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        user = User(username='batch-test', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+    return app, client
+
+
+def test_invalid_batches_rejected():
+    app, client = _client()
+    too_many = ['egg'] * (app.config['BATCH_MAX_ITEMS'] + 1)
+    for body in [{'items': 'banana'}, ['banana'], {'items': ['banana', '']},
+                 {'items': ['banana', 3]}, {'items': {'a': 'banana'}}, {'items': []}, {'items': too_many}]:
+        response = client.post('/api/meals/analyze-batch', json=body)
+        assert response.status_code == 400, (body, response.status_code)
+        assert response.get_json()['error'] is True
+
+    response = client.post('/api/meals/analyze-batch', data='not json', content_type='application/json')
+    assert response.status_code == 400
+
+    # A valid batch of staple foods is answered from the offline database
+    response = client.post('/api/meals/analyze-batch', json={'items': [' 2 eggs ', 'a banana']})
+    assert response.status_code == 200, response.data
+    data = response.get_json()
+    assert data['model_calls'] == 0
+    assert [r['query'] for r in data['results']] == ['2 eggs', 'a banana']
+
+
+if __name__ == '__main__':
+    print("Testing analyze-batch validation...")
+    print("-" * 50)
+    try:
+        test_invalid_batches_rejected()
+        print("✅ Malformed batch requests are rejected with 400")
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
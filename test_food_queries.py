@@ -0,0 +1,77 @@
+"""
+Tests for text food query parsing and the offline nutrition lookup
+(app/meals/food_query.py, app/meals/nutrition_db.py)
+
+Checks that single foods normalize to (quantity, unit, base food), that
+composite queries are rejected so they're never cached per unit, and that
+fuzzy matching fixes typos without resolving dishes to an ingredient.
+Usage: python test_food_queries.py (or pytest test_food_queries.py)
+"""
+import sys
+import os
+import io
+
+# Fix encoding for Windows console
+if __name__ == '__main__':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+# Ensure the project root is on the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.meals.food_query import parse_food_query, _singular
+from app.meals.nutrition_db import get_index, lookup_food
+
+
+def test_single_foods():
+    assert parse_food_query('2 eggs') == (2, 'unit', 'egg')
+    assert parse_food_query('two eggs') == (2, 'unit', 'egg')
+    assert parse_food_query('Eggs x2') == (2, 'unit', 'egg')
+    assert parse_food_query('0.2 kg chicken breast') == (200, 'g', 'chicken breast')
+    assert parse_food_query('a banana') == (1.0, 'unit', 'banana')
+    assert parse_food_query('a dozen eggs') == (12, 'unit', 'egg')
+    assert parse_food_query('half a cup of rice') == (0.5, 'cup', 'rice')
+
+
+def test_composite_queries_rejected():
+    for query in ['2 eggs and toast', '3 eggs and toast', 'chicken with rice',
+                  'beans on toast', 'eggs, toast', 'eggs & toast', 'eggs + toast']:
+        assert parse_food_query(query) is None, query
+
+
+def test_singular():
+    assert _singular('eggs') == 'egg'
+    assert _singular('apples') == 'apple'
+    assert _singular('strawberries') == 'strawberry'
+    assert _singular('tomatoes') == 'tomato'
+    assert _singular('hummus') == 'hummus'
+    assert _singular('couscous') == 'couscous'
+    assert _singular('asparagus') == 'asparagus'
+    assert _singular('molasses') == 'molasses'
+    assert _singular('glass') == 'glass'
+
+
+def test_fuzzy_match_typos_only():
+    index = get_index()
+    assert index.match('bananna')[0]['name'] == 'banana'
+    assert index.match('chiken breast')[0]['name'] == 'chicken breast'
+    assert index.match('brocoli')[0]['name'] == 'broccoli'
+
+    # Dishes must not resolve to one of their ingredients
+    for dish in ['apple pie', 'chocolate cake', 'banana bread', 'chicken curry']:
+        assert index.match(dish) == (None, 0), dish
+    assert lookup_food(1, 'unit', 'apple pie') is None
+    assert lookup_food(1, 'slice', 'chocolate cake') is None
+
+
+if __name__ == '__main__':
+    print("Testing food query parsing...")
+    print("-" * 50)
+    try:
+        test_single_foods()
+        test_composite_queries_rejected()
+        test_singular()
+        test_fuzzy_match_typos_only()
+        print("✅ Food queries parse correctly, composite queries and dishes fall through to Gemini")
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
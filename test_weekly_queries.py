@@ -0,0 +1,93 @@
+"""
+Regression test: /dashboard/weekly must be a single SQL query
+
+Runs the endpoint against an in-memory SQLite database, counts the
+statements that read the daily_nutrition rollup (and that none scan the
+meal table) and checks the per-day totals.
+Usage: python test_weekly_queries.py (or pytest test_weekly_queries.py)
+"""
+import sys
+import os
+import io
+from datetime import datetime, timezone, timedelta
+
+# Fix encoding for Windows console
+if __name__ == '__main__':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+# Ensure the project root is on the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Use a throwaway in-memory database
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from sqlalchemy import event
+from app import create_app
+from app.extensions import db
+from app.models import User, Meal
+from app.meals.daily_rollup import rebuild, check
+
+
+def test_weekly_single_query():
+    app = create_app()
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        user = User(username='weekly-test', password_hash='x', daily_calorie_target=2000)
+        db.session.add(user)
+        db.session.commit()
+
+        now = datetime.now(timezone.utc)
+        today = now.replace(hour=12, minute=0, second=0, microsecond=0)
+        if today > now:
+            today = now
+        for days_ago, calories in [(0, 500), (0, 300), (2, 700), (6, 400), (9, 1000)]:
+            db.session.add(Meal(user_id=user.id, food_name=f'meal {days_ago}', calories=calories,
+                                protein=10, carbs=20, fat=5, logged_at=today - timedelta(days=days_ago)))
+        db.session.commit()
+        rebuild()
+        assert check() == [], 'rollup disagrees with meals after rebuild'
+        user_id = user.id
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+
+    meal_queries = []
+    rollup_queries = []
+
+    def count_meal_queries(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM meal' in statement:
+            meal_queries.append(statement)
+        if 'FROM daily_nutrition' in statement:
+            rollup_queries.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count_meal_queries)
+        try:
+            response = client.get('/api/dashboard/weekly?tz_offset=0')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_meal_queries)
+
+    assert response.status_code == 200, response.data
+    assert len(rollup_queries) == 1, f'expected 1 rollup query, got {len(rollup_queries)}'
+    assert not meal_queries, f'weekly should not scan meals, ran {len(meal_queries)} meal queries'
+
+    days = response.get_json()['days']
+    assert len(days) == 7
+    assert days[6]['total_calories'] == 800 and days[6]['meal_count'] == 2
+    assert days[4]['total_calories'] == 700
+    assert days[0]['total_calories'] == 400
+    assert sum(d['meal_count'] for d in days) == 4  # the 9-day-old meal is out of range
+
+
+if __name__ == '__main__':
+    print("Testing weekly dashboard aggregation...")
+    print("-" * 50)
+    try:
+        test_weekly_single_query()
+        print("✅ /dashboard/weekly ran one rollup query and returned correct totals")
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)